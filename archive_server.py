@@ -0,0 +1,227 @@
+import os
+import re
+import shutil
+import threading
+from urllib.parse import unquote, urlparse
+
+# Extensions worth storing precompressed; images and WOFF fonts are already compressed
+COMPRESSIBLE = {'.html', '.htm', '.css', '.js', '.json', '.xml', '.svg', '.txt', '.ttf', '.map'}
+
+# Files smaller than this are served as they are
+MIN_COMPRESS_SIZE = 1024
+
+# Encodings in order of preference, with the suffix of their precompressed file
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _mimetypes():
+    import mimetypes
+    mimetypes.add_type('font/woff', '.woff')
+    mimetypes.add_type('font/woff2', '.woff2')
+    mimetypes.add_type('font/ttf', '.ttf')
+    mimetypes.add_type('image/svg+xml', '.svg')
+    mimetypes.add_type('image/webp', '.webp')
+    mimetypes.add_type('text/javascript', '.js')
+    return mimetypes
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def precompress_directory(root):
+    """Write .gz (and .br if the brotli package is installed) next to compressible files.
+
+    Variants newer than their source are left alone, so this is cheap to
+    run again after every download. Returns the number of files written.
+    """
+    import gzip
+    brotli = _brotli()
+    written = 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if stat.st_size < MIN_COMPRESS_SIZE:
+                continue
+
+            for encoding, suffix in ENCODINGS:
+                if encoding == 'br' and brotli is None:
+                    continue
+                variant = path + suffix
+                if os.path.exists(variant) and os.stat(variant).st_mtime_ns >= stat.st_mtime_ns:
+                    continue
+                with open(path, 'rb') as f:
+                    data = f.read()
+                if encoding == 'br':
+                    data = brotli.compress(data, quality=11)
+                else:
+                    data = gzip.compress(data, compresslevel=9, mtime=0)
+                if len(data) >= stat.st_size:
+                    continue
+                tmp_path = variant + '.part'
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, variant)
+                written += 1
+    return written
+
+
+def make_handler(root):
+    """Request handler class serving files under root"""
+    from http.server import BaseHTTPRequestHandler
+
+    root = os.path.realpath(root)
+    mimetypes = _mimetypes()
+
+    class ArchiveHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_HEAD(self):
+            self.serve(send_body=False)
+
+        def do_GET(self):
+            self.serve(send_body=True)
+
+        def resolve(self):
+            """Map the request path to a file under root, or None"""
+            path = unquote(urlparse(self.path).path)
+            full_path = os.path.realpath(os.path.join(root, path.lstrip('/')))
+            if full_path != root and not full_path.startswith(root + os.sep):
+                return None
+            if os.path.isdir(full_path):
+                full_path = os.path.join(full_path, 'index.html')
+            if not os.path.isfile(full_path) and not os.path.splitext(full_path)[1]:
+                # Pages are saved as "<name>.html"
+                full_path += '.html'
+            return full_path if os.path.isfile(full_path) else None
+
+        def pick_variant(self, path, stat):
+            """Return (file path, stat, encoding) for the best precompressed variant"""
+            accepted = {part.split(';')[0].strip().lower()
+                        for part in self.headers.get('Accept-Encoding', '').split(',')}
+            for encoding, suffix in ENCODINGS:
+                if encoding not in accepted:
+                    continue
+                try:
+                    variant_stat = os.stat(path + suffix)
+                except OSError:
+                    continue
+                if variant_stat.st_mtime_ns >= stat.st_mtime_ns:
+                    return path + suffix, variant_stat, encoding
+            return path, stat, None
+
+        def serve(self, send_body):
+            path = self.resolve()
+            if path is None:
+                self.send_error(404)
+                return
+            stat = os.stat(path)
+            content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+            if content_type.startswith('text/') or content_type in ('application/json', 'image/svg+xml'):
+                content_type += '; charset=utf-8'
+
+            compressible = os.path.splitext(path)[1].lower() in COMPRESSIBLE
+            file_path, file_stat, encoding = path, stat, None
+            if compressible and not self.headers.get('Range'):
+                # Ranges always refer to the identity body
+                file_path, file_stat, encoding = self.pick_variant(path, stat)
+            etag = f'"{file_stat.st_size:x}-{file_stat.st_mtime_ns:x}{"-" + encoding if encoding else ""}"'
+
+            if etag in [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+
+            size = file_stat.st_size
+            start, end = 0, size - 1
+            status = 200
+            range_header = self.headers.get('Range')
+            if range_header and encoding is None and self.headers.get('If-Range', etag) == etag:
+                match = _RANGE_RE.match(range_header.strip())
+                if match and (match.group(1) or match.group(2)):
+                    if match.group(1):
+                        start = int(match.group(1))
+                        end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+                    else:
+                        start = max(0, size - int(match.group(2)))
+                    if start > end or start >= size:
+                        self.send_response(416)
+                        self.send_header('Content-Range', f'bytes */{size}')
+                        self.send_header('Content-Length', '0')
+                        self.end_headers()
+                        return
+                    status = 206
+
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(end - start + 1))
+            self.send_header('ETag', etag)
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('Cache-Control', 'no-cache')
+            if compressible:
+                self.send_header('Vary', 'Accept-Encoding')
+            if encoding:
+                self.send_header('Content-Encoding', encoding)
+            if status == 206:
+                self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+            self.end_headers()
+
+            if send_body and size:
+                with open(file_path, 'rb') as f:
+                    self.wfile.flush()
+                    try:
+                        self.connection.sendfile(f, start, end - start + 1)
+                    except (OSError, AttributeError):
+                        f.seek(start)
+                        shutil.copyfileobj(_limited(f, end - start + 1), self.wfile)
+
+    return ArchiveHandler
+
+
+class _limited:
+    """File wrapper that stops after count bytes"""
+
+    def __init__(self, f, count):
+        self.f = f
+        self.remaining = count
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.f.read(size)
+        self.remaining -= len(data)
+        return data
+
+
+def start_archive_server(root, port=0, host='127.0.0.1', precompress=True):
+    """Serve root from a daemon thread; returns the server (its URL is server.url).
+
+    With precompress, missing .gz/.br variants are built in the background
+    and picked up by later requests as they appear.
+    """
+    from http.server import ThreadingHTTPServer
+
+    server = ThreadingHTTPServer((host, port), make_handler(root))
+    server.daemon_threads = True
+    server.url = f"http://{host}:{server.server_port}/"
+    threading.Thread(target=server.serve_forever, name='archive-server', daemon=True).start()
+    if precompress:
+        threading.Thread(target=precompress_directory, args=(root,),
+                         name='archive-precompress', daemon=True).start()
+    return server
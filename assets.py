@@ -0,0 +1,284 @@
+import os
+import json
+import array
+import hashlib
+import threading
+from urllib.parse import urlsplit
+
+# Project subfolder of each asset kind
+KINDS = ('css', 'js', 'images', 'fonts')
+
+# Asset states; an asset left PENDING or IN_PROGRESS never reached disk
+PENDING, IN_PROGRESS, DONE, FAILED, SKIPPED = range(5)
+STATUS_NAMES = ('pending', 'in_progress', 'done', 'failed', 'skipped')
+
+DIGEST_SIZE = hashlib.sha256().digest_size
+_NO_DIGEST = bytes(DIGEST_SIZE)
+
+# 2: local file names carry a hash of the URL; older tables point at files
+# that are no longer where file_name() says, so they are not loaded
+FILE_VERSION = 2
+
+# Column name, array typecode, in the order they are saved
+_COLUMNS = (
+    ('host', 'I'), ('directory', 'I'), ('kind', 'B'), ('status', 'B'),
+    ('priority', 'B'), ('size', 'q'), ('elapsed', 'f'),
+)
+
+
+def _split_url(url):
+    """Split url into (scheme+host, directory, leaf) that concatenate back to url"""
+    start = url.find('://')
+    start = start + 3 if start >= 0 else 0
+    end = len(url)
+    for separator in '/?#':
+        position = url.find(separator, start)
+        if position >= 0:
+            end = min(end, position)
+    rest = url[end:]
+    cut = rest.split('?', 1)[0].split('#', 1)[0].rfind('/') + 1
+    return url[:end], rest[:cut], rest[cut:]
+
+
+def _url_key(url):
+    """64-bit key for the URL index; collisions are checked against the stored URL"""
+    return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class StringColumn:
+    """Append-only strings packed into one bytearray, addressed by index"""
+
+    __slots__ = ('data', 'offsets')
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array.array('Q', [0])
+
+    def append(self, value):
+        self.data += value.encode('utf-8')
+        self.offsets.append(len(self.data))
+        return len(self.offsets) - 2
+
+    def __getitem__(self, index):
+        return self.data[self.offsets[index]:self.offsets[index + 1]].decode('utf-8')
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+
+class InternTable:
+    """Strings stored once and referred to by a small integer id"""
+
+    __slots__ = ('strings', 'ids')
+
+    def __init__(self, strings=()):
+        self.strings = list(strings)
+        self.ids = {value: i for i, value in enumerate(self.strings)}
+
+    def intern(self, value):
+        index = self.ids.get(value)
+        if index is None:
+            index = self.ids[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+    def __getitem__(self, index):
+        return self.strings[index]
+
+    def __len__(self):
+        return len(self.strings)
+
+
+class AssetTable:
+    """Per-asset state of a download run, kept in typed arrays.
+
+    An asset is a row id. Its URL is split into an interned scheme+host, an
+    interned directory and a packed leaf (file name and query), and the
+    remaining fields live in one array per column, so a tracked asset costs
+    a couple of hundred bytes instead of a dict of Python objects. The
+    local path is derived from the kind and the URL, and differs for every
+    row, so two assets can never be saved over each other.
+    """
+
+    __slots__ = ('hosts', 'directories', 'leaves', 'host', 'directory', 'kind', 'status',
+                 'priority', 'size', 'elapsed', 'digests', 'settled', 'index', 'collisions',
+                 'tally', 'done_bytes', 'lock')
+
+    def __init__(self):
+        self.hosts = InternTable()
+        self.directories = InternTable()
+        self.leaves = StringColumn()
+        for name, typecode in _COLUMNS:
+            setattr(self, name, array.array(typecode))
+        self.digests = bytearray()
+        self.settled = bytearray()  # 1 once the row got a final status in this process
+        self.index = {}       # _url_key(url) -> row
+        self.collisions = {}  # url -> row, for the rare key clash
+        # Kept up to date on every change, so that progress reports don't scan the rows
+        self.tally = [0] * len(STATUS_NAMES)  # rows per status
+        self.done_bytes = 0                   # sum of the sizes of DONE rows
+        # Download and writer threads update rows concurrently; guards the totals
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.kind)
+
+    def find(self, url):
+        """Row of url, or None if it is not tracked"""
+        row = self.index.get(_url_key(url))
+        if row is not None and self.url(row) == url:
+            return row
+        return self.collisions.get(url)
+
+    def add(self, url, kind, priority=0):
+        """Row for url, adding it as PENDING if new (kind is one of KINDS)"""
+        key = _url_key(url)
+        row = self.index.get(key)
+        if row is not None:
+            if self.url(row) == url:
+                return row
+            row = self.collisions.get(url)
+            if row is not None:
+                return row
+
+        host, directory, leaf = _split_url(url)
+        new_row = len(self)
+        self.host.append(self.hosts.intern(host))
+        self.directory.append(self.directories.intern(directory))
+        self.leaves.append(leaf)
+        self.kind.append(KINDS.index(kind))
+        self.status.append(PENDING)
+        self.priority.append(priority)
+        self.size.append(-1)
+        self.elapsed.append(0.0)
+        self.digests += _NO_DIGEST
+        self.settled.append(0)
+        self.tally[PENDING] += 1
+        if row is None:
+            self.index[key] = new_row
+        else:
+            self.collisions[url] = new_row
+        return new_row
+
+    def url(self, row):
+        return self.hosts[self.host[row]] + self.directories[self.directory[row]] + self.leaves[row]
+
+    def kind_name(self, row):
+        return KINDS[self.kind[row]]
+
+    def file_name(self, row):
+        """URL file name plus a short hash of the whole URL, e.g. 'logo-1f2e3d4c.png'.
+
+        /a/logo.png, /b/logo.png and logo.png?w=100 all get their own file.
+        """
+        url = self.url(row)
+        stem, extension = os.path.splitext(os.path.basename(urlsplit(url).path))
+        tag = hashlib.blake2b(url.encode('utf-8'), digest_size=4).hexdigest()
+        return f'{stem or "asset"}-{tag}{extension}'
+
+    def relative_path(self, row):
+        """Path of the asset inside the project folder, e.g. 'images/logo.png'"""
+        return f'{KINDS[self.kind[row]]}/{self.file_name(row)}'
+
+    def digest(self, row):
+        """SHA-256 of the saved file, or None if not recorded"""
+        digest = bytes(self.digests[row * DIGEST_SIZE:(row + 1) * DIGEST_SIZE])
+        return None if digest == _NO_DIGEST else digest
+
+    def set_status(self, row, status):
+        with self.lock:
+            self._set_status(row, status)
+
+    def _set_status(self, row, status):
+        old = self.status[row]
+        if old != status:
+            self.tally[old] -= 1
+            self.tally[status] += 1
+            if old == DONE:
+                self.done_bytes -= max(self.size[row], 0)
+            elif status == DONE:
+                self.done_bytes += max(self.size[row], 0)
+            self.status[row] = status
+        self.settled[row] = status in (DONE, FAILED, SKIPPED)
+
+    def done_this_run(self, row):
+        """True if row was saved since the table was created or loaded"""
+        return self.settled[row] and self.status[row] == DONE
+
+    def record(self, row, size, digest=None, elapsed=None):
+        """Mark row DONE with the size (and hash/fetch time, if known) of its file"""
+        with self.lock:
+            if self.status[row] == DONE:
+                self.done_bytes += max(size, 0) - max(self.size[row], 0)
+            self.size[row] = size
+            if digest is not None:
+                self.digests[row * DIGEST_SIZE:(row + 1) * DIGEST_SIZE] = digest
+            if elapsed is not None:
+                self.elapsed[row] = elapsed
+            self._set_status(row, DONE)
+
+    def rows(self, status=None):
+        """Row ids, optionally only those with the given status"""
+        if status is None:
+            return range(len(self))
+        return (row for row, value in enumerate(self.status) if value == status)
+
+    def counts(self):
+        """Number of assets per status name"""
+        return dict(zip(STATUS_NAMES, self.tally))
+
+    def bytes_done(self):
+        return self.done_bytes
+
+    # Persistence: a JSON header line followed by the raw columns
+
+    def save(self, path):
+        header = {
+            'version': FILE_VERSION,
+            'count': len(self),
+            'hosts': self.hosts.strings,
+            'directories': self.directories.strings,
+            'leaf_bytes': len(self.leaves.data),
+        }
+        with open(path + '.part', 'wb') as f:
+            f.write(json.dumps(header).encode('utf-8') + b'\n')
+            for name, _ in _COLUMNS:
+                getattr(self, name).tofile(f)
+            self.leaves.offsets.tofile(f)
+            f.write(self.leaves.data)
+            f.write(self.digests)
+        os.replace(path + '.part', path)
+
+    @classmethod
+    def load(cls, path):
+        """Table saved at path, or an empty one if there is none"""
+        table = cls()
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            return table
+        with f:
+            header = json.loads(f.readline())
+            if header.get('version') != FILE_VERSION:
+                return table
+            count = header['count']
+            table.hosts = InternTable(header['hosts'])
+            table.directories = InternTable(header['directories'])
+            for name, _ in _COLUMNS:
+                getattr(table, name).fromfile(f, count)
+            table.leaves.offsets = array.array('Q')
+            table.leaves.offsets.fromfile(f, count + 1)
+            table.leaves.data = bytearray(f.read(header['leaf_bytes']))
+            table.digests = bytearray(f.read(count * DIGEST_SIZE))
+        table.settled = bytearray(count)
+        table.tally = [table.status.count(value) for value in range(len(STATUS_NAMES))]
+        table.done_bytes = sum(max(size, 0) for size, status in zip(table.size, table.status)
+                               if status == DONE)
+        for row in range(count):
+            url = table.url(row)
+            key = _url_key(url)
+            if key in table.index:
+                table.collisions[url] = row
+            else:
+                table.index[key] = row
+        return table
@@ -0,0 +1,56 @@
+"""Memory benchmark for the asset table.
+
+Fills an AssetTable with synthetic asset URLs spread over a realistic
+number of hosts and directories, marks them downloaded, and reports the
+traced bytes per asset. Exits non-zero when that is over budget.
+
+    python benchmarks/asset_memory.py
+    python benchmarks/asset_memory.py --assets 100000 --budget 300
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assets import AssetTable, KINDS  # noqa: E402
+
+EXTENSIONS = {'css': '.css', 'js': '.js', 'images': '.jpg', 'fonts': '.woff2'}
+
+
+def synthetic_urls(count, hosts=50, directories=2000):
+    for i in range(count):
+        kind = KINDS[i % len(KINDS)]
+        host = f'https://cdn{i % hosts}.example.com'
+        directory = f'/static/{kind}/{(i // 7) % directories:04d}/'
+        yield kind, f'{host}{directory}asset-{i:07d}{EXTENSIONS[kind]}?v={i % 97}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--assets', type=int, default=1000000)
+    parser.add_argument('--budget', type=float, default=300,
+                        help='maximum bytes per tracked asset')
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    table = AssetTable()
+    for kind, url in synthetic_urls(args.assets):
+        row = table.add(url, kind)
+        table.record(row, 12345, bytes(32), 0.25)
+    elapsed = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    per_asset = current / args.assets
+    status = 'ok' if per_asset <= args.budget else 'FAIL'
+    print(f"{args.assets} assets in {elapsed:.1f} s, {current / 2**20:.1f} MiB traced")
+    print(f"{per_asset:.0f} bytes per asset (budget {args.budget:.0f}) {status}")
+    sys.exit(0 if status == 'ok' else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Import-time benchmark for the CLI and GUI entry modules.
+
+Runs ``python -X importtime`` in a fresh interpreter for each module and
+reports the cumulative import time. Exits non-zero when a module is slower
+than its budget or when it pulls in a dependency that should stay lazy.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --runs 10 --budget-ms 150
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must not be imported just by loading the entry module
+LAZY_MODULES = ('requests', 'bs4', 'tqdm')
+
+TARGETS = {
+    'download': 30,
+    'downloader_gui': 150,
+}
+
+LINE_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def measure(module):
+    """Return (cumulative microseconds, set of imported modules) for one cold import"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    total = 0
+    imported = set()
+    for line in result.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if not match:
+            continue
+        name = match.group(4)
+        imported.add(name.split('.')[0])
+        if name == module:
+            total = int(match.group(2))
+    return total, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=None,
+                        help='override the per-module budget')
+    args = parser.parse_args()
+
+    failed = False
+    for module, budget_ms in TARGETS.items():
+        if args.budget_ms is not None:
+            budget_ms = args.budget_ms
+        try:
+            samples = [measure(module) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"{module:16} skipped ({e})")
+            continue
+
+        best_ms = min(total for total, _ in samples) / 1000
+        eager = sorted(set(LAZY_MODULES) & samples[0][1])
+        status = 'ok'
+        if best_ms > budget_ms or eager:
+            status = 'FAIL'
+            failed = True
+        print(f"{module:16} {best_ms:8.1f} ms (budget {budget_ms:.0f} ms) {status}")
+        if eager:
+            print(f"{'':16} eagerly imports: {', '.join(eager)}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
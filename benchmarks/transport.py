@@ -0,0 +1,193 @@
+"""Transport benchmark: HTTP/1.1 and HTTP/2 asset fetching on a local test server.
+
+Starts a local HTTP/1.1 server and, when the optional h2 package is
+installed, a cleartext HTTP/2 server. Each server waits --latency seconds
+before answering, to stand in for a round trip to a CDN. Then it fetches
+--assets small files the way a page's assets are fetched: sequentially as
+before, and through each transport at its concurrency. It reports
+wall-clock time, requests per second and TCP connections opened, plus
+the DNS lookups saved by the in-process DNS cache.
+
+    python benchmarks/transport.py
+    python benchmarks/transport.py --assets 500 --latency 0.05 --size 32768
+"""
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transport import (DEFAULT_CONCURRENCY, DNSCache, Http1Transport,  # noqa: E402
+                       Http2Transport, http2_available)
+
+
+class Http1Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; don't let Nagle hold the body back
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        body = self.server.payload
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http1_server(latency, payload):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Http1Handler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.payload = payload
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class H2cServer:
+    """Minimal cleartext HTTP/2 server (prior knowledge) built on the h2 package"""
+
+    def __init__(self, latency, payload):
+        self.latency = latency
+        self.payload = payload
+        self.connections = 0
+        self.listener = socket.create_server(('127.0.0.1', 0))
+        self.server_port = self.listener.getsockname()[1]
+        threading.Thread(target=self.accept, daemon=True).start()
+
+    def accept(self):
+        while True:
+            sock, _ = self.listener.accept()
+            self.connections += 1
+            threading.Thread(target=self.serve, args=(sock,), daemon=True).start()
+
+    def serve(self, sock):
+        import h2.config
+        import h2.connection
+        import h2.events
+
+        conn = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False))
+        window_open = threading.Condition()
+        conn.initiate_connection()
+        sock.sendall(conn.data_to_send())
+
+        def respond(stream_id):
+            time.sleep(self.latency)
+            data = memoryview(self.payload)
+            with window_open:
+                conn.send_headers(stream_id, [(':status', '200'),
+                                              ('content-length', str(len(data)))])
+                sock.sendall(conn.data_to_send())
+                while data:
+                    size = min(conn.local_flow_control_window(stream_id),
+                               conn.max_outbound_frame_size, len(data))
+                    if size <= 0:
+                        window_open.wait()
+                        continue
+                    conn.send_data(stream_id, data[:size].tobytes(), end_stream=size == len(data))
+                    sock.sendall(conn.data_to_send())
+                    data = data[size:]
+
+        while True:
+            try:
+                received = sock.recv(65536)
+            except OSError:
+                return
+            if not received:
+                return
+            with window_open:
+                events = conn.receive_data(received)
+                sock.sendall(conn.data_to_send())
+                for event in events:
+                    if isinstance(event, h2.events.RequestReceived):
+                        threading.Thread(target=respond, args=(event.stream_id,), daemon=True).start()
+                    elif isinstance(event, h2.events.WindowUpdated):
+                        window_open.notify_all()
+                    elif isinstance(event, h2.events.ConnectionTerminated):
+                        return
+
+
+def fetch_all(get, urls, concurrency):
+    """Fetch every URL with up to concurrency requests in flight; returns elapsed seconds"""
+    started = time.perf_counter()
+    if concurrency <= 1:
+        for url in urls:
+            get(url)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(get, urls))
+    return time.perf_counter() - started
+
+
+def report(name, server, urls, elapsed, connections_before):
+    print(f"{name:34} {elapsed:7.2f} s  {len(urls) / elapsed:8.1f} req/s  "
+          f"{server.connections - connections_before:4d} connections")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--assets', type=int, default=200)
+    parser.add_argument('--size', type=int, default=16 * 1024, help='bytes per asset')
+    parser.add_argument('--latency', type=float, default=0.02,
+                        help='seconds the server waits before each response')
+    args = parser.parse_args()
+
+    import requests
+
+    payload = b'x' * args.size
+    DNSCache.default().install()
+
+    http1_server = start_http1_server(args.latency, payload)
+    # "localhost" so that every new connection needs a name lookup
+    urls = [f"http://localhost:{http1_server.server_port}/asset/{i}" for i in range(args.assets)]
+    print(f"{args.assets} assets of {args.size} bytes, {args.latency * 1000:.0f} ms server latency\n")
+
+    def plain_get(url):
+        # The downloader before transports: a new connection per request
+        return requests.get(url, headers={'Connection': 'close'}).content
+
+    before = http1_server.connections
+    report("requests.get, sequential", http1_server, urls,
+           fetch_all(plain_get, urls, 1), before)
+
+    transport = Http1Transport()
+    before = http1_server.connections
+    report("http1 session, sequential", http1_server, urls,
+           fetch_all(lambda url: transport.get(url).content, urls, 1), before)
+    before = http1_server.connections
+    report(f"http1 session, {transport.concurrency} concurrent", http1_server, urls,
+           fetch_all(lambda url: transport.get(url).content, urls, transport.concurrency), before)
+    transport.close()
+
+    if http2_available():
+        h2_server = H2cServer(args.latency, payload)
+        h2_urls = [f"http://localhost:{h2_server.server_port}/asset/{i}" for i in range(args.assets)]
+        for concurrency in (DEFAULT_CONCURRENCY['http1'], DEFAULT_CONCURRENCY['http2']):
+            transport = Http2Transport(concurrency, http1=False)
+            before = h2_server.connections
+            report(f"http2 multiplexed, {concurrency} concurrent", h2_server, h2_urls,
+                   fetch_all(lambda url: transport.get(url).content, h2_urls, concurrency), before)
+            transport.close()
+    else:
+        print("http2 skipped (pip install httpx[http2])")
+
+    dns = DNSCache.default()
+    print(f"\nDNS cache: {dns.misses} lookups, {dns.hits} answered from cache")
+
+
+if __name__ == '__main__':
+    main()
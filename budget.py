@@ -0,0 +1,127 @@
+# Defaults for bandwidth-budget mode
+MAX_ASSET_BYTES = 500 * 1024
+PAGE_BYTE_BUDGET = 5 * 1024 * 1024
+TARGET_WIDTH = 1280
+
+# 1x1 transparent GIF used in place of skipped images
+PLACEHOLDER_IMAGE = 'data:image/gif;base64,R0lGODlhAQABAIAAAAAAACH5BAEAAAAALAAAAAABAAEAAAIBRAA7'
+
+
+class OverBudget(Exception):
+    """Raised while streaming an asset whose body turned out to exceed the budget"""
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def parse_srcset(srcset):
+    """Parse a srcset attribute into a list of (url, width, density).
+
+    width is set for 'w' descriptors, density for 'x' descriptors; a
+    candidate without a descriptor counts as 1x.
+    """
+    candidates = []
+    text = srcset or ''
+    pos = 0
+    while pos < len(text):
+        # Skip separators, then take the URL up to the next whitespace
+        while pos < len(text) and (text[pos].isspace() or text[pos] == ','):
+            pos += 1
+        start = pos
+        while pos < len(text) and not text[pos].isspace():
+            pos += 1
+        url = text[start:pos]
+        descriptor = ''
+        if url.endswith(','):
+            url = url.rstrip(',')
+        else:
+            end = text.find(',', pos)
+            end = len(text) if end < 0 else end
+            descriptor = text[pos:end].strip()
+            pos = end
+        if not url:
+            continue
+
+        width = density = None
+        try:
+            if descriptor.endswith('w'):
+                width = float(descriptor[:-1])
+            elif descriptor.endswith('x'):
+                density = float(descriptor[:-1])
+            else:
+                density = 1.0
+        except ValueError:
+            continue
+        candidates.append((url, width, density))
+    return candidates
+
+
+def pick_candidate(candidates, target_width=TARGET_WIDTH):
+    """Pick the smallest candidate that is still adequate.
+
+    Width candidates: the narrowest at least target_width wide, else the
+    widest. Density candidates: the lowest density of at least 1x.
+    """
+    widths = [c for c in candidates if c[1] is not None]
+    if widths:
+        adequate = [c for c in widths if c[1] >= target_width]
+        if adequate:
+            return min(adequate, key=lambda c: c[1])[0]
+        return max(widths, key=lambda c: c[1])[0]
+
+    densities = [c for c in candidates if c[2] is not None]
+    if densities:
+        adequate = [c for c in densities if c[2] >= 1]
+        if adequate:
+            return min(adequate, key=lambda c: c[2])[0]
+        return max(densities, key=lambda c: c[2])[0]
+    return None
+
+
+class BandwidthBudget:
+    """Per-asset size cap and per-page byte budget, with a record of what was skipped"""
+
+    def __init__(self, max_asset_bytes=MAX_ASSET_BYTES, page_byte_budget=PAGE_BYTE_BUDGET):
+        self.max_asset_bytes = max_asset_bytes
+        self.page_byte_budget = page_byte_budget
+        self.pages = {}
+        self.page = None
+
+    def start_page(self, url):
+        self.page = self.pages[url] = {'skipped': [], 'bytes_downloaded': 0, 'bytes_saved': 0}
+
+    def check(self, size):
+        """Return None if an asset of size bytes fits, else the reason to skip it.
+
+        An asset of unknown size is let through while the page budget lasts;
+        download_file stops its body if it turns out too large.
+        """
+        if size is None:
+            if self.page_byte_budget and self.page['bytes_downloaded'] >= self.page_byte_budget:
+                return 'over_page_budget'
+            return None
+        if self.max_asset_bytes and size > self.max_asset_bytes:
+            return 'too_large'
+        if self.page_byte_budget and self.page['bytes_downloaded'] + size > self.page_byte_budget:
+            return 'over_page_budget'
+        return None
+
+    def skip(self, url, size, reason):
+        self.page['skipped'].append({'url': url, 'size': size, 'reason': reason})
+        self.page['bytes_saved'] += size or 0
+
+    def consume(self, size):
+        self.page['bytes_downloaded'] += size
+
+    @property
+    def bytes_saved(self):
+        return sum(page['bytes_saved'] for page in self.pages.values())
+
+    def report(self):
+        return {
+            'max_asset_bytes': self.max_asset_bytes,
+            'page_byte_budget': self.page_byte_budget,
+            'bytes_saved': self.bytes_saved,
+            'pages': self.pages,
+        }
@@ -0,0 +1,103 @@
+import os
+import json
+from collections import namedtuple
+from budget import MAX_ASSET_BYTES, PAGE_BYTE_BUDGET
+
+# Read-only view of one entry in projects.json. Building one touches
+# nothing on disk, unlike WebDownloader which creates the project folders.
+ProjectInfo = namedtuple('ProjectInfo', [
+    'name', 'urls', 'replace_links', 'replace_forms', 'budget_mode',
+    'max_asset_bytes', 'page_byte_budget', 'sitemap_lastmod', 'transport', 'concurrency',
+    'timestamp', 'base_dir'
+])
+
+
+class ProjectCatalog:
+    """In-memory cache of projects.json, reloaded only when the file changes"""
+
+    _instances = {}
+
+    def __init__(self, projects_file):
+        self.projects_file = projects_file
+        self._signature = None
+        self._projects = {}
+        self._names = []
+
+    @classmethod
+    def default(cls):
+        """Shared catalog for the projects.json under the current directory"""
+        projects_file = os.path.join(os.getcwd(), 'projects', 'projects.json')
+        catalog = cls._instances.get(projects_file)
+        if catalog is None:
+            catalog = cls._instances[projects_file] = cls(projects_file)
+        return catalog
+
+    def _stat_signature(self):
+        try:
+            stat = os.stat(self.projects_file)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def refresh(self):
+        """Reload projects.json if its mtime, size or inode changed"""
+        signature = self._stat_signature()
+        if signature == self._signature:
+            return False
+
+        projects = {}
+        if signature is not None:
+            try:
+                with open(self.projects_file, 'r') as f:
+                    projects = json.load(f)
+            except (OSError, ValueError):
+                projects = {}
+        self._projects = projects
+        self._names = list(projects.keys())
+        self._signature = signature
+        return True
+
+    def invalidate(self):
+        """Force the next access to re-read projects.json"""
+        self._signature = None
+        self._projects = {}
+        self._names = []
+
+    def names(self):
+        """Project names in file order"""
+        self.refresh()
+        return list(self._names)
+
+    def __contains__(self, name):
+        self.refresh()
+        return name in self._projects
+
+    def __len__(self):
+        self.refresh()
+        return len(self._projects)
+
+    def get(self, name):
+        """Return a ProjectInfo for name, or None if there is no such project"""
+        self.refresh()
+        data = self._projects.get(name)
+        if data is None:
+            return None
+        return ProjectInfo(
+            name=name,
+            urls=tuple(data.get('urls', ())),
+            replace_links=data.get('replace_links', False),
+            replace_forms=data.get('replace_forms', False),  # Default False for backward compatibility
+            budget_mode=data.get('budget_mode', False),
+            max_asset_bytes=data.get('max_asset_bytes', MAX_ASSET_BYTES),
+            page_byte_budget=data.get('page_byte_budget', PAGE_BYTE_BUDGET),
+            sitemap_lastmod=data.get('sitemap_lastmod'),
+            transport=data.get('transport', 'http1'),
+            concurrency=data.get('concurrency'),
+            timestamp=data.get('timestamp'),
+            base_dir=data.get('base_dir', os.path.join(os.path.dirname(self.projects_file), name)),
+        )
+
+    def raw(self):
+        """Shallow copy of the parsed projects.json contents"""
+        self.refresh()
+        return {name: dict(data) for name, data in self._projects.items()}
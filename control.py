@@ -0,0 +1,115 @@
+import threading
+
+# How often a caller waiting on download workers checks whether the run was
+# cancelled; this bounds how long cancelling takes to return control
+POLL_SECONDS = 0.1
+
+
+class Cancelled(Exception):
+    """Raised inside a download once its run has been cancelled"""
+
+
+class RunControl:
+    """Cancel, pause and resume for one downloader's run, shared by all its threads.
+
+    Requests are sent through request(), which waits for the response
+    headers on a helper thread: cancelling releases the caller at once and
+    the late response is closed when it arrives. Responses being read are
+    registered until release(), and cancelling shuts down their sockets so
+    blocked reads return immediately instead of at the timeout.
+
+    Pausing holds new requests, and reads at their next chunk, in place:
+    the queue and the open responses are left as they are, so resuming
+    carries on without fetching anything again.
+    """
+
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self._running = threading.Event()  # cleared while paused
+        self._running.set()
+        # Reentrant: cancel() may run from a signal handler in a thread holding it
+        self._lock = threading.RLock()
+        self._responses = {}  # response being read -> function that aborts it
+        self._waiters = set()  # events of request() calls waiting for headers
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    def cancel(self):
+        """Stop the run: wake everything waiting and abort responses being read"""
+        self._cancelled.set()
+        self._running.set()
+        with self._lock:
+            responses = list(self._responses.items())
+            self._responses.clear()
+            waiters = list(self._waiters)
+        for waiter in waiters:
+            waiter.set()
+        for response, abort in responses:
+            abort(response)
+
+    def pause(self):
+        if not self.cancelled:
+            self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def wait(self):
+        """Block while paused; returns False once the run is cancelled"""
+        self._running.wait()
+        return not self.cancelled
+
+    def checkpoint(self):
+        """Block while paused; raise Cancelled once the run is cancelled"""
+        if not self.wait():
+            raise Cancelled()
+
+    def request(self, send, abort, *args, **kwargs):
+        """Return send(*args, **kwargs), a response registered until release().
+
+        abort(response) must make reads of the response return from any
+        thread; it is called for responses still registered on cancel.
+        """
+        self.checkpoint()
+        done = threading.Event()
+        result = {}
+
+        def run():
+            try:
+                response = send(*args, **kwargs)
+            except Exception as e:
+                result['error'] = e
+            else:
+                with self._lock:
+                    if self.cancelled:
+                        abort(response)
+                        response.close()
+                    else:
+                        self._responses[response] = abort
+                        result['response'] = response
+            done.set()
+
+        with self._lock:
+            self._waiters.add(done)
+        try:
+            threading.Thread(target=run, daemon=True).start()
+            done.wait()
+        finally:
+            with self._lock:
+                self._waiters.discard(done)
+        if 'error' in result:
+            raise result['error']
+        if 'response' not in result:
+            raise Cancelled()
+        return result['response']
+
+    def release(self, response):
+        """Stop tracking a response once it has been read or closed"""
+        with self._lock:
+            self._responses.pop(response, None)
@@ -1,27 +1,158 @@
 import os
 import json
-import requests
-from bs4 import BeautifulSoup
+import time
+import hashlib
 from urllib.parse import urljoin, urlparse
 import re
-from tqdm import tqdm
 from datetime import datetime
+from catalog import ProjectCatalog
+from http_cache import HttpCache
+from writer import DiskWriter
+from transport import DEFAULT_CONCURRENCY, TRANSPORTS, make_transport
+from control import POLL_SECONDS, Cancelled, RunControl
+from assets import AssetTable, PENDING, IN_PROGRESS, DONE, FAILED, SKIPPED
+from metrics import (PAGES_COMPLETED, ASSETS_COMPLETED, BYTES_DOWNLOADED, ERRORS,
+                     QUEUE_DEPTH, mark_progress, track_request, start_metrics_server)
+from budget import (BandwidthBudget, OverBudget, MAX_ASSET_BYTES, PAGE_BYTE_BUDGET, TARGET_WIDTH,
+                    PLACEHOLDER_IMAGE, parse_srcset, pick_candidate)
+from scheduler import (AssetQueue, AssetTask, PRIORITY_STYLESHEET, PRIORITY_FONT,
+                       PRIORITY_DEFERRED, script_priority, image_priorities)
+
+# requests, bs4 and tqdm are imported where they are first used so that
+# listing projects or starting the GUI does not pay for loading them.
+
+# Network read size; the disk writer buffers these into larger writes
+CHUNK_SIZE = 64 * 1024
+
+# Range requests tried per file to continue a body whose connection was lost
+RESUME_ATTEMPTS = 3
+
+# Pages downloaded between saves of the asset table; it is also saved when
+# a run is cancelled or ends (save_assets)
+ASSET_SAVE_PAGES = 10
 
 class WebDownloader:
     def __init__(self, project_name):
         self.project_name = project_name
         self.base_dir = os.path.join(os.getcwd(), 'projects', project_name)
         self.links_file = os.path.join(self.base_dir, 'links.json')
+        self.assets_file = os.path.join(self.base_dir, 'assets.idx')
+        self.manifest_file = os.path.join(self.base_dir, 'manifest.json')
         self.projects_file = os.path.join(os.getcwd(), 'projects', 'projects.json')
         self.urls = []
         self.replace_links = False
         self.replace_forms = False
+        self.budget_mode = False
+        self.max_asset_bytes = MAX_ASSET_BYTES
+        self.page_byte_budget = PAGE_BYTE_BUDGET
+        self.sitemap_lastmod = None
+        self.transport_name = 'http1'
+        self.concurrency = None
+        self._transport = None
+        self.budget = None
+        self.head_cache = {}
+        self.use_cache = True
+        self.cache_only = False
+        self._http_cache = None
+        self.fsync = False
+        self._writer = None
+        self._assets = None
+        self.unsaved_pages = 0
+        self._estimates = None
         self.total_files = 0
         self.progress_callback = None
         self.file_callback = None
-        self.abort = False
+        self.control = RunControl()
         self.setup_directories()
 
+    @property
+    def cache(self):
+        """Shared HttpCache, opened on first use (None when caching is off)"""
+        if not self.use_cache and not self.cache_only:
+            return None
+        if self._http_cache is None:
+            self._http_cache = HttpCache.default()
+        return self._http_cache
+
+    @property
+    def transport(self):
+        """HTTP client for this project's transport setting, created on first use"""
+        if self._transport is None:
+            self._transport = make_transport(self.transport_name, self.concurrency)
+        return self._transport
+
+    def request(self, method, url, **kwargs):
+        """Send a request through the transport under the run's control (see control.py).
+        The response stays registered for cancellation until control.release()."""
+        transport = self.transport
+        return self.control.request(getattr(transport, method), transport.abort, url, **kwargs)
+
+    def cancel(self):
+        """Stop the run from any thread; saved assets are kept, the rest stay pending"""
+        self.control.cancel()
+
+    def pause(self):
+        """Hold the run where it is, without dropping queued or open downloads"""
+        self.control.pause()
+
+    def resume(self):
+        self.control.resume()
+
+    @property
+    def writer(self):
+        """Background DiskWriter that performs this downloader's file writes"""
+        if self._writer is None:
+            self._writer = DiskWriter(fsync=self.fsync)
+        return self._writer
+
+    @property
+    def assets(self):
+        """AssetTable of every asset this project has tracked, loaded on first use"""
+        if self._assets is None:
+            self._assets = AssetTable.load(self.assets_file)
+        return self._assets
+
+    def save_assets(self):
+        """Write the asset table to assets.idx (at the end of a run, or when cancelled)"""
+        if self._assets is not None:
+            self._assets.save(self.assets_file)
+        self.unsaved_pages = 0
+
+    def asset_path(self, row):
+        """Local path of an asset table row"""
+        return os.path.join(self.base_dir, *self.assets.relative_path(row).split('/'))
+
+    def plan(self, urls=None, workers=None):
+        """Dry run: resolve and size every asset of the project's pages, without
+        downloading asset bodies, and save the result as manifest.json.
+
+        The next download of these pages reports progress in bytes against
+        the manifest, and reuses its sizes instead of sending HEAD requests.
+        """
+        from plan import HEAD_WORKERS, plan_pages, save_manifest
+        manifest = plan_pages(self, urls or self.urls, workers or HEAD_WORKERS)
+        save_manifest(manifest, self.manifest_file)
+        self.use_plan(manifest)
+        return manifest
+
+    def use_plan(self, manifest):
+        from plan import page_estimates
+        self._estimates = page_estimates(manifest)
+        for asset in manifest['assets']:
+            if asset['size'] is not None:
+                self.head_cache.setdefault(asset['url'], asset['size'])
+
+    def planned_page(self, url):
+        """{asset url: estimated bytes} for a planned page, or None without a plan"""
+        from plan import load_manifest
+        if self._estimates is None:
+            manifest = load_manifest(self.manifest_file)
+            if manifest:
+                self.use_plan(manifest)
+            else:
+                self._estimates = {}
+        return self._estimates.get(url)
+
     def set_progress_callback(self, callback):
         self.progress_callback = callback
 
@@ -48,6 +179,12 @@ class WebDownloader:
             'urls': self.urls,
             'replace_links': self.replace_links,
             'replace_forms': self.replace_forms,
+            'budget_mode': self.budget_mode,
+            'max_asset_bytes': self.max_asset_bytes,
+            'page_byte_budget': self.page_byte_budget,
+            'sitemap_lastmod': self.sitemap_lastmod,
+            'transport': self.transport_name,
+            'concurrency': self.concurrency,
             'timestamp': datetime.now().isoformat(),
             'base_dir': self.base_dir
         }
@@ -55,6 +192,7 @@ class WebDownloader:
         os.makedirs(os.path.dirname(self.projects_file), exist_ok=True)
         with open(self.projects_file, 'w') as f:
             json.dump(projects_data, f, indent=4)
+        ProjectCatalog.default().invalidate()
 
     def load_projects_data(self):
         """Load all projects data"""
@@ -67,57 +205,303 @@ class WebDownloader:
     @classmethod
     def list_projects(cls):
         """List all saved projects"""
-        projects_file = os.path.join(os.getcwd(), 'projects', 'projects.json')
-        try:
-            with open(projects_file, 'r') as f:
-                projects = json.load(f)
-            return projects
-        except:
-            return {}
+        return ProjectCatalog.default().raw()
 
     @classmethod
     def load_project(cls, project_name):
         """Load existing project"""
-        projects = cls.list_projects()
-        if project_name in projects:
-            downloader = cls(project_name)
-            project_data = projects[project_name]
-            downloader.urls = project_data['urls']
-            downloader.replace_links = project_data['replace_links']
-            downloader.replace_forms = project_data.get('replace_forms', False)  # Default False for backward compatibility
-            return downloader
-        return None
-
-    def download_file(self, url, local_path, position=1):
-        """Download a file from URL with nested progress bar"""
+        info = ProjectCatalog.default().get(project_name)
+        if info is None:
+            return None
+        downloader = cls(project_name)
+        downloader.urls = list(info.urls)
+        downloader.replace_links = info.replace_links
+        downloader.replace_forms = info.replace_forms
+        downloader.budget_mode = info.budget_mode
+        downloader.max_asset_bytes = info.max_asset_bytes
+        downloader.page_byte_budget = info.page_byte_budget
+        downloader.sitemap_lastmod = info.sitemap_lastmod
+        downloader.transport_name = info.transport
+        downloader.concurrency = info.concurrency
+        return downloader
+
+    def add_urls(self, urls):
+        """Append new URLs in bulk, skipping ones already in the project"""
+        known = set(self.urls)
+        added = 0
+        for url in urls:
+            if url not in known:
+                known.add(url)
+                self.urls.append(url)
+                added += 1
+        return added
+
+    def seed_from_sitemap(self, url, include=None, exclude=None, incremental=True):
+        """Add page URLs from a site's robots.txt/sitemaps and save the project.
+
+        url is either a site URL (sitemaps are found through robots.txt) or a
+        sitemap/sitemap index URL. When incremental, only entries with a
+        lastmod newer than the previous seed are added.
+        """
+        from sitemap import SitemapSeeder, parse_lastmod
+        since = parse_lastmod(self.sitemap_lastmod) if incremental else None
+        seeder = SitemapSeeder(include=include, exclude=exclude, since=since)
+        added = self.add_urls(seeder.iter_urls(seeder.discover(url)))
+        # After a failed sitemap, its entries must still count as new next time
+        if seeder.newest_lastmod and not seeder.sitemaps_failed:
+            self.sitemap_lastmod = seeder.newest_lastmod.isoformat()
+        self.save_project_data()
+        print(f"Read {seeder.sitemaps_read} sitemaps, added {added} URLs")
+        if seeder.sitemaps_failed:
+            print(f"{seeder.sitemaps_failed} sitemaps could not be read; "
+                  f"the next incremental seed starts from the same lastmod again")
+        return added
+
+    def download_file(self, url, local_path, position=1, asset=None):
+        """Download a file from URL with nested progress bar.
+
+        Fresh entries in the shared HTTP cache are copied instead of fetched,
+        stale ones are revalidated, and in cache-only mode the network is
+        never used. With an asset row, its size, hash and fetch time are
+        recorded in the asset table as soon as the body is in; the writer
+        thread then saves the file, and marks the row FAILED if it can't
+        (the error is returned by writer.flush()). A body whose connection
+        is lost part way, e.g. closed by the server during a long pause, is
+        continued with a Range request where the server allows it.
+        """
+        handle = None
+        response = None
+        started = time.time()
         try:
-            response = requests.get(url, stream=True)
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
             filename = os.path.basename(local_path)
-            
-            if self.file_callback:
-                self.file_callback(downloaded, total_size, filename)
-            
-            with open(local_path, 'wb') as f:
-                for data in response.iter_content(chunk_size=1024):
-                    if self.abort:
-                        return False
-                    size = f.write(data)
-                    downloaded += size
-                    if self.file_callback:
-                        self.file_callback(downloaded, total_size, filename)
-                        
+            cache = self.cache
+            entry = cache.lookup(url) if cache else None
+            if entry and (self.cache_only or cache.is_fresh(entry)):
+                return self.copy_from_cache(entry, local_path, asset)
+            if self.cache_only:
+                print(f"Not in cache (offline mode): {url}")
+                return False
+
+            headers = cache.conditional_headers(entry) if entry else {}
+            with track_request(url, os.path.basename(os.path.dirname(local_path))):
+                response = self.request('get', url, stream=True, headers=headers)
+                if entry and response.status_code == 304:
+                    cache.revalidated(entry, response.headers)
+                    return self.copy_from_cache(entry, local_path, asset)
+                if cache:
+                    cache.miss()
+                if not 200 <= response.status_code < 300:
+                    # An error page is not the asset
+                    ERRORS.inc(type=f'http_{response.status_code}')
+                    print(f"Error downloading {url}: HTTP {response.status_code}")
+                    return False
+
+                total_size = int(response.headers.get('content-length', 0))
+                downloaded = 0
+                
+                if self.file_callback:
+                    self.file_callback(downloaded, total_size, filename)
+                
+                # Chunks are handed to the writer thread, which commits the
+                # file atomically while the next request is already running
+                status, response_headers = response.status_code, response.headers
+                # Sizes are checked before fetching, but not every response has one
+                budget = self.budget if self.budget_mode else None
+                handle = self.writer.open(local_path)
+                digest = hashlib.sha256()
+                resumes = 0
+                while True:
+                    try:
+                        for data in response.iter_content(chunk_size=CHUNK_SIZE):
+                            self.control.checkpoint()
+                            self.writer.write(handle, data)
+                            digest.update(data)
+                            downloaded += len(data)
+                            BYTES_DOWNLOADED.inc(len(data))
+                            if budget is not None:
+                                reason = budget.check(downloaded)
+                                if reason is not None:
+                                    raise OverBudget(reason)
+                            if self.file_callback:
+                                self.file_callback(downloaded, total_size, filename)
+                        break
+                    except OverBudget:
+                        raise
+                    except Exception:
+                        # A read broken off by cancel() is not a failed request
+                        self.control.checkpoint()
+                        if resumes == RESUME_ATTEMPTS:
+                            raise
+                        resumes += 1
+                        resumed = self.resume_download(url, response, downloaded)
+                        if resumed is None:
+                            raise
+                        self.control.release(response)
+                        response.close()
+                        response = resumed
+                # A read woken by cancel() may end the body early without an error
+                self.control.checkpoint()
+
+            elapsed = time.time() - started
+            if asset is not None:
+                self.assets.record(asset, downloaded, digest.digest(), elapsed)
+
+            def on_commit(status=status, headers=response_headers):
+                if cache:
+                    cache.store_file(url, status, headers, local_path)
+            # The writer saves the file in the background; failures come back
+            # through on_error and writer.flush()
+            self.writer.commit(handle, on_commit, self.write_failed(asset))
+            if self.budget_mode and self.budget:
+                self.budget.consume(downloaded)
             return True
+        except OverBudget as e:
+            self.writer.discard(handle)
+            self.budget.consume(downloaded)
+            self.budget.skip(url, None, e.reason)
+            if asset is not None:
+                self.assets.set_status(asset, SKIPPED)
+            print(f"Skipped {url}: over the bandwidth budget ({e.reason})")
+            return False
         except Exception as e:
-            print(f"Error downloading {url}: {e}")
+            if handle is not None:
+                self.writer.discard(handle)
+            if not self.control.cancelled:
+                print(f"Error downloading {url}: {e}")
             return False
+        finally:
+            if response is not None:
+                self.control.release(response)
+                response.close()
+
+    def write_failed(self, asset):
+        """on_error for the writer: an asset recorded as saved did not reach the disk"""
+        if asset is None:
+            return None
+        return lambda: self.assets.set_status(asset, FAILED)
+
+    def resume_download(self, url, response, offset):
+        """Request the rest of response's body from offset, or None if the server can't send it"""
+        if offset == 0 or 'bytes' not in response.headers.get('accept-ranges', ''):
+            return None
+        if response.headers.get('content-encoding', 'identity').lower() != 'identity':
+            # offset counts decoded bytes, but a Range applies to the encoded body
+            return None
+        headers = {'Range': f'bytes={offset}-'}
+        validator = response.headers.get('etag') or response.headers.get('last-modified')
+        if validator:
+            headers['If-Range'] = validator
+        resumed = self.request('get', url, stream=True, headers=headers)
+        if resumed.status_code != 206 or \
+                not resumed.headers.get('content-range', '').startswith(f'bytes {offset}-'):
+            self.control.release(resumed)
+            resumed.close()
+            return None
+        return resumed
+
+    def fetch_text(self, url, kind='page'):
+        """GET url as text through the shared HTTP cache"""
+        cache = self.cache
+        entry = cache.lookup(url) if cache else None
+        if entry and (self.cache_only or cache.is_fresh(entry)):
+            return cache.read(entry).decode('utf-8', errors='replace')
+        if self.cache_only:
+            raise RuntimeError(f"Not in cache (offline mode): {url}")
+
+        headers = cache.conditional_headers(entry) if entry else {}
+        with track_request(url, kind):
+            response = self.request('get', url, headers=headers)
+            self.control.release(response)
+        BYTES_DOWNLOADED.inc(len(response.content))
+        if entry and response.status_code == 304:
+            cache.revalidated(entry, response.headers)
+            return cache.read(entry).decode('utf-8', errors='replace')
+        if not 200 <= response.status_code < 300:
+            ERRORS.inc(type=f'http_{response.status_code}')
+            raise RuntimeError(f"HTTP {response.status_code}")
+        if cache:
+            cache.miss()
+            cache.store_file(url, response.status_code, response.headers,
+                             data=response.text.encode('utf-8'))
+        return response.text
+
+    def copy_from_cache(self, entry, local_path, asset=None):
+        """Materialize a cached body at local_path"""
+        body_path = self.cache.body_path(entry['key'])
+        if asset is not None:
+            with open(body_path, 'rb') as f:
+                digest = hashlib.file_digest(f, 'sha256') if hasattr(hashlib, 'file_digest') \
+                    else hashlib.sha256(f.read())
+            self.assets.record(asset, entry['size'], digest.digest(), 0.0)
+        self.writer.copy(body_path, local_path, on_error=self.write_failed(asset))
+        self.cache.hit(entry)
+        if self.budget_mode and self.budget:
+            self.budget.consume(entry['size'])
+        if self.file_callback:
+            self.file_callback(entry['size'], entry['size'], os.path.basename(local_path))
+        return True
+
+    def remote_size(self, url):
+        """Content-Length of url from a HEAD request, cached per URL (None if unknown)"""
+        if url in self.head_cache:
+            return self.head_cache[url]
+        size = None
+        try:
+            response = self.request('head', url, timeout=10)
+            self.control.release(response)
+            if response.ok and 'content-length' in response.headers:
+                size = int(response.headers['content-length'])
+        except Cancelled:
+            raise
+        except Exception:
+            size = None
+        self.head_cache[url] = size
+        return size
+
+    def select_responsive_images(self, soup):
+        """Point each <img> at its smallest adequate srcset/<picture> candidate"""
+        for img in soup.find_all('img'):
+            candidates = parse_srcset(img.get('srcset'))
+            picture = img.parent if img.parent is not None and img.parent.name == 'picture' else None
+            if picture is not None:
+                for source in picture.find_all('source'):
+                    candidates.extend(parse_srcset(source.get('srcset')))
+            if not candidates:
+                continue
+            if img.get('src') and not any(c[1] is not None for c in candidates):
+                candidates.append((img['src'], None, 1.0))
+
+            chosen = pick_candidate(candidates, TARGET_WIDTH)
+            if chosen:
+                img['src'] = chosen
+                for attr in ('srcset', 'sizes'):
+                    if attr in img.attrs:
+                        del img[attr]
+                if picture is not None:
+                    for source in picture.find_all('source'):
+                        source.decompose()
+
+    def check_budget(self, task, url):
+        """Return True if task may be fetched; otherwise record and apply the skip"""
+        size = self.remote_size(url)
+        reason = self.budget.check(size)
+        if reason is None:
+            return True
+        self.budget.skip(url, size, reason)
+        self.assets.set_status(task.asset, SKIPPED)
+        task.skip(PLACEHOLDER_IMAGE)
+        return False
+
+    def save_budget_report(self):
+        """Write the skipped assets and bytes saved to budget_report.json"""
+        with open(os.path.join(self.base_dir, 'budget_report.json'), 'w') as f:
+            json.dump(self.budget.report(), f, indent=4)
 
     def count_total_files(self, url):
         """Count total number of files to download"""
+        from bs4 import BeautifulSoup
         try:
-            response = requests.get(url)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = BeautifulSoup(self.fetch_text(url), 'html.parser')
             
             images = len(soup.find_all('img'))
             scripts = len(soup.find_all('script', src=True))
@@ -129,46 +513,258 @@ class WebDownloader:
                 href = css.get('href')
                 if href:
                     absolute_url = urljoin(url, href)
-                    css_response = requests.get(absolute_url)
-                    urls = re.findall(r'url\([\'"]?(.*?)[\'"]?\)', css_response.text)
+                    css_text = self.fetch_text(absolute_url, kind='css')
+                    urls = re.findall(r'url\([\'"]?(.*?)[\'"]?\)', css_text)
                     css_resources += len([u for u in urls if not u.startswith('data:')])
             
             return images + scripts + css_files + css_resources
         except:
             return 0
 
-    def process_css(self, css_content, css_url, main_pbar):
-        """Process CSS file and download its resources"""
+    def find_css_resources(self, css_content, css_url):
+        """Return (url, absolute_url, is_font) for each url() in CSS"""
         # Find all URLs in CSS
         url_pattern = r'url\([\'"]?(.*?)[\'"]?\)'
-        urls = re.findall(url_pattern, css_content)
-        
-        for url in urls:
+        resources = []
+        for url in re.findall(url_pattern, css_content):
             if url.startswith('data:'):
                 continue
-                
+
             absolute_url = urljoin(css_url, url)
             file_name = os.path.basename(urlparse(absolute_url).path)
-            
-            if any(ext in file_name.lower() for ext in ['.ttf', '.woff', '.woff2']):
-                local_path = os.path.join(self.base_dir, 'fonts', file_name)
-                resource_path = f'../fonts/{file_name}'
+            is_font = any(ext in file_name.lower() for ext in ['.ttf', '.woff', '.woff2'])
+            resources.append((url, absolute_url, is_font))
+        return resources
+
+    def page_path(self, url):
+        """Local path of the HTML file for a page URL"""
+        page_name = os.path.basename(urlparse(url).path)
+        if not page_name:
+            page_name = 'index.html'
+        elif not page_name.endswith('.html'):
+            page_name += '.html'
+        return os.path.join(self.base_dir, page_name)
+
+    def write_text(self, path, content):
+        """Replace a text file atomically via the writer thread"""
+        self.writer.write_text(path, content)
+
+    def schedule_page_assets(self, soup, base_url):
+        """Queue the assets referenced by a page in render-critical order.
+
+        Until an asset is on disk its tag points at the absolute URL, so the
+        page written before the first download already loads everything.
+        """
+        queue = AssetQueue()
+        assets = self.assets
+
+        if self.budget_mode:
+            self.select_responsive_images(soup)
+
+        def set_attr(tag, attr, value):
+            return lambda: tag.__setitem__(attr, value)
+
+        def keep_remote(tag, attr, absolute_url):
+            # Skipped assets keep loading from the site
+            return lambda placeholder: tag.__setitem__(attr, absolute_url)
+
+        def use_placeholder(tag, attr):
+            return lambda placeholder: tag.__setitem__(attr, placeholder)
+
+        for css in soup.find_all('link', rel='stylesheet'):
+            href = css.get('href')
+            if href:
+                absolute_url = css['href'] = urljoin(base_url, href)
+                row = assets.add(absolute_url, 'css', PRIORITY_STYLESHEET)
+                queue.push(PRIORITY_STYLESHEET, AssetTask(
+                    row, set_attr(css, 'href', assets.relative_path(row)),
+                    keep_remote(css, 'href', absolute_url)))
+
+        for script in soup.find_all('script', src=True):
+            absolute_url = script['src'] = urljoin(base_url, script['src'])
+            priority = script_priority(script)
+            row = assets.add(absolute_url, 'js', priority)
+            queue.push(priority, AssetTask(
+                row, set_attr(script, 'src', assets.relative_path(row)),
+                keep_remote(script, 'src', absolute_url)))
+
+        for img, priority in image_priorities(soup.find_all('img')):
+            src = img.get('src')
+            if src:
+                absolute_url = img['src'] = urljoin(base_url, src)
+                row = assets.add(absolute_url, 'images', priority)
+                queue.push(priority, AssetTask(
+                    row, set_attr(img, 'src', assets.relative_path(row)),
+                    use_placeholder(img, 'src')))
+
+        return queue
+
+    def schedule_css_resources(self, queue, stylesheet, css_url):
+        """Queue fonts and images of a fetched stylesheet.
+
+        Until a resource is on disk the stylesheet points at its absolute URL,
+        so a partially mirrored stylesheet still resolves everything.
+        """
+        for url, absolute_url, is_font in self.find_css_resources(stylesheet['source'], css_url):
+            priority = PRIORITY_FONT if is_font else PRIORITY_DEFERRED
+            row = self.assets.add(absolute_url, 'fonts' if is_font else 'images', priority)
+            resource_path = '../' + self.assets.relative_path(row)
+            stylesheet['replacements'][url] = absolute_url
+
+            def apply(url=url, resource_path=resource_path):
+                stylesheet['replacements'][url] = resource_path
+                stylesheet['dirty'] = True
+
+            def skip(placeholder, url=url, is_font=is_font):
+                # Fonts stay remote, images are blanked out
+                if not is_font:
+                    stylesheet['replacements'][url] = placeholder
+                    stylesheet['dirty'] = True
+
+            queue.push(priority, AssetTask(row, apply, skip))
+
+    def write_stylesheet(self, local_path, stylesheet):
+        """Write a stylesheet with its references replaced and record it in the asset table"""
+        css_content = stylesheet['source']
+        for url, replacement in stylesheet['replacements'].items():
+            css_content = css_content.replace(url, replacement)
+        self.write_text(local_path, css_content)
+        data = css_content.encode('utf-8')
+        self.assets.record(stylesheet['asset'], len(data), hashlib.sha256(data).digest())
+        stylesheet['dirty'] = False
+
+    def flush_page(self, page_path, soup, stylesheets):
+        """Rewrite the page and any stylesheets whose references changed"""
+        for local_path, stylesheet in stylesheets.items():
+            if stylesheet['dirty']:
+                self.write_stylesheet(local_path, stylesheet)
+        self.write_text(page_path, str(soup))
+
+    def fetch_stylesheet(self, task, queue, stylesheets):
+        """Fetch a stylesheet and queue its resources; it is written out by flush_page"""
+        row = task.asset
+        url = self.assets.url(row)
+        try:
+            source = self.fetch_text(url, kind='css')
+        except Cancelled:
+            return PENDING
+        except Exception as e:
+            print(f"Error downloading {url}: {e}")
+            self.assets.set_status(row, FAILED)
+            task.skip(None)
+            return FAILED
+        if self.budget_mode and self.budget:
+            self.budget.consume(len(source.encode('utf-8')))
+        stylesheet = {'source': source, 'replacements': {}, 'dirty': True, 'asset': row}
+        stylesheets[self.asset_path(row)] = stylesheet
+        self.schedule_css_resources(queue, stylesheet, url)
+        task.apply()
+        return DONE
+
+    def fetch_asset(self, row):
+        """Download one asset table row; returns its new status (PENDING if cancelled)"""
+        if not self.control.wait():
+            return PENDING
+        self.assets.set_status(row, IN_PROGRESS)
+        if self.download_file(self.assets.url(row), self.asset_path(row), position=1, asset=row):
+            return DONE
+        if self.control.cancelled:
+            self.assets.set_status(row, PENDING)
+            return PENDING
+        if self.assets.status[row] == SKIPPED:
+            return SKIPPED  # cut off by the bandwidth budget
+        self.assets.set_status(row, FAILED)
+        return FAILED
+
+    def fetch_level(self, tasks, queue, stylesheets):
+        """Fetch the tasks of one priority level, yielding (task, status) as each finishes.
+
+        Stylesheets go first, one at a time, since they queue more tasks.
+        Other assets are downloaded up to the transport's concurrency at a
+        time, except in budget mode, which needs each download counted
+        before deciding on the next. apply() and skip() always run in the
+        calling thread. Once the run is cancelled nothing more is yielded,
+        within POLL_SECONDS even if workers are still winding down.
+        """
+        assets = self.assets
+        downloads = {}  # row -> tasks referencing it, so each URL is fetched once
+        for task in tasks:
+            row = task.asset
+            if assets.kind_name(row) == 'css':
+                if self.budget_mode and not self.check_budget(task, assets.url(row)):
+                    # Kept remote, like skipped scripts; its resources are not queued
+                    yield task, SKIPPED
+                    continue
+                yield task, self.fetch_stylesheet(task, queue, stylesheets)
+            elif assets.done_this_run(row):
+                # Shared with a page already downloaded in this run
+                task.apply()
+                yield task, DONE
+            elif self.budget_mode:
+                if not self.check_budget(task, assets.url(row)):
+                    yield task, SKIPPED
+                    continue
+                status = self.fetch_asset(row)
+                if status == DONE:
+                    task.apply()
+                elif status == SKIPPED:
+                    task.skip(PLACEHOLDER_IMAGE)
+                yield task, status
             else:
-                local_path = os.path.join(self.base_dir, 'images', file_name)
-                resource_path = f'../images/{file_name}'
-            
-            if self.download_file(absolute_url, local_path, position=1):
-                css_content = css_content.replace(url, resource_path)
-                main_pbar.update(1)
-                
-        return css_content
+                downloads.setdefault(row, []).append(task)
+
+        pool = None
+        if self.transport.concurrency > 1 and len(downloads) > 1:
+            from concurrent.futures import ThreadPoolExecutor
+            pool = ThreadPoolExecutor(max_workers=min(self.transport.concurrency, len(downloads)))
+            futures = {pool.submit(self.fetch_asset, row): row for row in downloads}
+            results = self.completed(futures)
+        else:
+            results = ((row, self.fetch_asset(row)) for row in downloads)
+        try:
+            for row, status in results:
+                for task in downloads[row]:
+                    if status == DONE:
+                        task.apply()
+                    yield task, status
+        finally:
+            if pool is not None:
+                for future in futures:
+                    future.cancel()
+                # Workers of a cancelled run finish in the background
+                pool.shutdown(wait=not self.control.cancelled)
+
+    def completed(self, futures):
+        """Yield (row, status) from fetch_asset futures as they finish, until cancelled"""
+        from concurrent.futures import FIRST_COMPLETED, wait
+        pending = set(futures)
+        while pending and not self.control.cancelled:
+            done, pending = wait(pending, timeout=POLL_SECONDS, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield futures[future], future.result()
 
     def download_page(self, url):
-        """Download webpage and its assets"""
+        """Download webpage and its assets.
+
+        Assets are fetched in priority order (see scheduler.py). The HTML is
+        written before the first asset and rewritten whenever a priority
+        level finishes, so an interrupted run still leaves a usable page.
+        Returns True if the page and all of its assets were saved.
+        """
+        from bs4 import BeautifulSoup
+        from tqdm import tqdm
         try:
             print(f"\nProcessing webpage: {url}")
-            self.total_files = self.count_total_files(url)
+            # With a plan (see plan.py) progress is counted in bytes, otherwise in files
+            estimates = self.planned_page(url)
+            if estimates is not None:
+                self.total_files = sum(estimates.values())
+                average = self.total_files // len(estimates) if estimates else 0
+                counted = set()
+            else:
+                self.total_files = self.count_total_files(url)
             completed_files = 0
+            failed_files = 0
             
             if self.progress_callback:
                 self.progress_callback(completed_files, self.total_files)
@@ -176,121 +772,364 @@ class WebDownloader:
             if self.replace_links:
                 print("Replacing all links with href='#'...")
             
-            response = requests.get(url)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = BeautifulSoup(self.fetch_text(url), 'html.parser')
             base_url = url
 
+            # Replace all links if option is enabled
+            if self.replace_links:
+                for link in soup.find_all('a'):
+                    link['href'] = '#'
+            
+            # Replace all form actions if option is enabled
+            if self.replace_forms:
+                for form in soup.find_all('form'):
+                    form['action'] = '#'
+
+            if self.budget_mode:
+                if self.budget is None:
+                    self.budget = BandwidthBudget(self.max_asset_bytes, self.page_byte_budget)
+                self.budget.start_page(url)
+
+            assets = self.assets
+            queue = self.schedule_page_assets(soup, base_url)
+            stylesheets = {}
+            page_path = self.page_path(url)
+            self.write_text(page_path, str(soup))
+
             # Main progress bar for all files
+            units = {'unit': 'B', 'unit_scale': True} if estimates is not None else {}
             with tqdm(total=self.total_files, desc="Total Progress", 
                      position=0, colour='red', leave=False,
-                     bar_format='{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]') as main_pbar:
-                
-                # Replace all links if option is enabled
-                if self.replace_links:
-                    for link in soup.find_all('a'):
-                        link['href'] = '#'
-                
-                # Replace all form actions if option is enabled
-                if self.replace_forms:
-                    for form in soup.find_all('form'):
-                        form['action'] = '#'
-                
-                # Download images
-                images = soup.find_all('img')
-                for img in images:
-                    if self.abort:
-                        return
-                    src = img.get('src')
-                    if src:
-                        absolute_url = urljoin(base_url, src)
-                        file_name = os.path.basename(urlparse(absolute_url).path)
-                        local_path = os.path.join(self.base_dir, 'images', file_name)
-                        if self.download_file(absolute_url, local_path, position=1):
-                            img['src'] = f'images/{file_name}'
-                            completed_files += 1
-                            if self.progress_callback:
-                                self.progress_callback(completed_files, self.total_files)
-                            # Update main progress bar color
-                            progress = completed_files / self.total_files
-                            if progress < 0.33:
-                                main_pbar.colour = 'red'
-                            elif progress < 0.66:
-                                main_pbar.colour = 'yellow'
-                            else:
-                                main_pbar.colour = 'green'
-                            main_pbar.update(1)
-
-                # Download JavaScript files
-                scripts = soup.find_all('script', src=True)
-                for script in scripts:
-                    if self.abort:
-                        return
-                    src = script['src']
-                    absolute_url = urljoin(base_url, src)
-                    file_name = os.path.basename(urlparse(absolute_url).path)
-                    local_path = os.path.join(self.base_dir, 'js', file_name)
-                    if self.download_file(absolute_url, local_path, position=1):
-                        script['src'] = f'js/{file_name}'
-                        completed_files += 1
-                        if self.progress_callback:
-                            self.progress_callback(completed_files, self.total_files)
-                        progress = completed_files / self.total_files
-                        if progress < 0.33:
-                            main_pbar.colour = 'red'
-                        elif progress < 0.66:
-                            main_pbar.colour = 'yellow'
+                     bar_format='{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]',
+                     **units) as main_pbar:
+
+                current_priority = None
+                # Pausing holds the run here between levels (and inside fetch_level)
+                while queue and self.control.wait():
+                    priority, tasks = queue.pop_level()
+                    unfinished = len(tasks)
+                    QUEUE_DEPTH.set(len(queue) + unfinished)
+                    if current_priority is not None and priority != current_priority:
+                        self.flush_page(page_path, soup, stylesheets)
+                    current_priority = priority
+
+                    for task, status in self.fetch_level(tasks, queue, stylesheets):
+                        # Stylesheets queue their resources while the level runs
+                        unfinished -= 1
+                        QUEUE_DEPTH.set(len(queue) + unfinished)
+                        if status == PENDING:
+                            continue  # cancelled before it finished
+                        row = task.asset
+                        if status == DONE:
+                            ASSETS_COMPLETED.inc(kind=assets.kind_name(row))
+                        elif status == FAILED:
+                            failed_files += 1
+                        # Failed and skipped assets count as processed too
+                        if estimates is None:
+                            step = 1
+                        elif row in counted:
+                            step = 0
                         else:
-                            main_pbar.colour = 'green'
-                        main_pbar.update(1)
-
-                # Download CSS files and their resources
-                css_files = soup.find_all('link', rel='stylesheet')
-                for css in css_files:
-                    if self.abort:
-                        return
-                    href = css.get('href')
-                    if href:
-                        absolute_url = urljoin(base_url, href)
-                        file_name = os.path.basename(urlparse(absolute_url).path)
-                        local_path = os.path.join(self.base_dir, 'css', file_name)
-                        
-                        css_response = requests.get(absolute_url)
-                        processed_css = self.process_css(css_response.text, absolute_url, main_pbar)
-                        
-                        with open(local_path, 'w', encoding='utf-8') as f:
-                            f.write(processed_css)
-                        
-                        css['href'] = f'css/{file_name}'
-                        completed_files += 1
+                            counted.add(row)
+                            step = estimates.get(assets.url(row))
+                            if step is None:
+                                # Not in the plan: the page changed since it was made
+                                step = average
+                                self.total_files += step
+                                main_pbar.total = self.total_files
+                        completed_files += step
+                        mark_progress()
                         if self.progress_callback:
                             self.progress_callback(completed_files, self.total_files)
-                        progress = completed_files / self.total_files
+                        # Update main progress bar color
+                        progress = completed_files / self.total_files if self.total_files else 0
                         if progress < 0.33:
                             main_pbar.colour = 'red'
                         elif progress < 0.66:
                             main_pbar.colour = 'yellow'
                         else:
                             main_pbar.colour = 'green'
-                        main_pbar.update(1)
+                        main_pbar.update(step)
+                # Whatever a cancelled run left behind is no longer being worked on
+                QUEUE_DEPTH.set(0)
 
                 # Save updated HTML
                 print("\nSaving HTML file...")
-                page_name = os.path.basename(urlparse(url).path)
-                if not page_name:
-                    page_name = 'index.html'
-                elif not page_name.endswith('.html'):
-                    page_name += '.html'
-                    
-                with open(os.path.join(self.base_dir, page_name), 'w', encoding='utf-8') as f:
-                    f.write(str(soup))
+                self.flush_page(page_path, soup, stylesheets)
+                for error in self.writer.flush():
+                    # e.g. the page itself or a stylesheet could not be written
+                    ERRORS.inc(type=type(error).__name__)
+                    failed_files += 1
+                if self.cache:
+                    self.cache.flush()
+                self.unsaved_pages += 1
+                if self.unsaved_pages >= ASSET_SAVE_PAGES or self.control.cancelled:
+                    self.save_assets()
+                counts = assets.counts()
+                print(f"Assets: {counts['done']} saved, {counts['failed']} failed, "
+                      f"{counts['skipped']} skipped, {assets.bytes_done()} bytes on disk")
+                if self.control.cancelled:
+                    print("Cancelled; the remaining assets are left pending")
+                    return False
+
+                if self.budget_mode:
+                    page_budget = self.budget.page
+                    print(f"Budget mode: skipped {len(page_budget['skipped'])} assets, "
+                          f"saved {page_budget['bytes_saved']} bytes")
+                    self.save_budget_report()
+
+                PAGES_COMPLETED.inc()
+                mark_progress()
+
+                if self.cache:
+                    stats = self.cache.stats
+                    print(f"Cache: {stats['hits']} hits, {stats['revalidated']} revalidated, "
+                          f"{stats['misses']} misses, {stats['bytes_saved']} bytes saved")
                 
                 # Clear all progress bars after completion
                 print('\n\033[K', end='')  # Move to new line and clear it
+                return failed_files == 0
 
+        except Cancelled:
+            return False
         except Exception as e:
             print(f"Error processing {url}: {e}")
+            return False
 
-def main():
+    def verify(self, workers=None):
+        """Check the saved assets against their recorded size and hash.
+
+        Returns [(row, problem)] for assets that are missing, incomplete,
+        truncated or corrupt (see verify.py).
+        """
+        from verify import verify_assets
+        return verify_assets(self.assets, self.base_dir, workers)
+
+    def repair(self, problems):
+        """Fetch again only the assets listed by verify(); returns how many were saved.
+
+        Pages and stylesheets written while an asset was missing still refer
+        to its URL, so they are pointed at the repaired files afterwards.
+        """
+        assets = self.assets
+        rows = [row for row, _ in problems]
+        stylesheets = [row for row in rows if assets.kind_name(row) == 'css']
+        for row in rows:
+            if assets.kind_name(row) == 'css':
+                continue
+            assets.set_status(row, IN_PROGRESS)
+            if not self.download_file(assets.url(row), self.asset_path(row), asset=row):
+                assets.set_status(row, FAILED)
+        # After the other assets, so that they can point at the repaired files
+        for row in stylesheets:
+            self.repair_stylesheet(row)
+        self.relink([row for row in rows if assets.status[row] == DONE], stylesheets)
+        for error in self.writer.flush():
+            ERRORS.inc(type=type(error).__name__)
+        self.save_assets()
+        return sum(1 for row in rows if assets.status[row] == DONE)
+
+    def relink(self, rows, rewritten=()):
+        """Point saved pages and stylesheets at the now saved asset rows.
+
+        Stylesheets in rewritten were already written against the repaired
+        files and are left alone.
+        """
+        from bs4 import BeautifulSoup
+        assets = self.assets
+        local = {assets.url(row): assets.relative_path(row) for row in rows}
+        if not local:
+            return
+        for url in self.urls:
+            page_path = self.page_path(url)
+            try:
+                with open(page_path, encoding='utf-8') as f:
+                    soup = BeautifulSoup(f.read(), 'html.parser')
+            except OSError:
+                continue
+            changed = False
+            for tag, attr in [(css, 'href') for css in soup.find_all('link', rel='stylesheet')] + \
+                    [(script, 'src') for script in soup.find_all('script', src=True)] + \
+                    [(img, 'src') for img in soup.find_all('img')]:
+                path = local.get(urljoin(url, tag.get(attr) or ''))
+                if path is not None and tag[attr] != path:
+                    tag[attr] = path
+                    changed = True
+            if changed:
+                self.write_text(page_path, str(soup))
+
+        # Stylesheets refer to resources they could not save by absolute URL
+        resources = sorted(((url, '../' + path) for url, path in local.items()
+                            if not path.startswith('css/')), key=lambda item: -len(item[0]))
+        for row in assets.rows(DONE):
+            if assets.kind_name(row) != 'css' or row in rewritten:
+                continue
+            css_path = self.asset_path(row)
+            try:
+                with open(css_path, encoding='utf-8') as f:
+                    css_content = f.read()
+            except OSError:
+                continue
+            updated = css_content
+            for url, path in resources:
+                updated = updated.replace(url, path)
+            if updated != css_content:
+                self.write_text(css_path, updated)
+                data = updated.encode('utf-8')
+                assets.record(row, len(data), hashlib.sha256(data).digest())
+
+    def repair_stylesheet(self, row):
+        """Fetch a stylesheet again, pointing it at whichever of its resources are saved"""
+        url = self.assets.url(row)
+        try:
+            source = self.fetch_text(url, kind='css')
+        except Exception as e:
+            print(f"Error downloading {url}: {e}")
+            self.assets.set_status(row, FAILED)
+            return
+        stylesheet = {'source': source, 'replacements': {}, 'dirty': True, 'asset': row}
+        for ref, absolute_url, _ in self.find_css_resources(source, url):
+            resource = self.assets.find(absolute_url)
+            saved = resource is not None and self.assets.status[resource] == DONE
+            stylesheet['replacements'][ref] = \
+                '../' + self.assets.relative_path(resource) if saved else absolute_url
+        self.write_stylesheet(self.asset_path(row), stylesheet)
+
+def parse_args(argv=None):
+    import argparse
+    from plan import HEAD_WORKERS
+    parser = argparse.ArgumentParser(description="WebSitePocket command line downloader")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="don't use the shared HTTP cache")
+    parser.add_argument('--offline', action='store_true',
+                        help="serve everything from the shared HTTP cache, never the network")
+    parser.add_argument('--cache-size', type=int, metavar='MB',
+                        help="cap the shared HTTP cache at this many megabytes")
+    parser.add_argument('--fsync', action='store_true',
+                        help="fsync downloaded files (in batches) before they are renamed into place")
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                        help="serve Prometheus metrics on 127.0.0.1:PORT/metrics")
+    parser.add_argument('--serve', action='store_true',
+                        help="serve the --project folder over HTTP for offline browsing")
+    parser.add_argument('--serve-dir', metavar='DIR',
+                        help="serve any mirrored folder over HTTP for offline browsing")
+    parser.add_argument('--port', type=int, default=8000,
+                        help="port for --serve/--serve-dir (default 8000)")
+    parser.add_argument('--snapshot', nargs='?', const='', metavar='LABEL',
+                        help="after downloading, keep a snapshot of the project folder")
+    parser.add_argument('--snapshots', action='store_true',
+                        help="list the project's snapshots")
+    parser.add_argument('--restore', metavar='SNAPSHOT',
+                        help="restore the project folder from a snapshot")
+    parser.add_argument('--clean', action='store_true',
+                        help="with --restore, remove files that are not in the snapshot")
+    parser.add_argument('--diff', nargs=2, metavar=('OLD', 'NEW'),
+                        help="show what changed between two snapshots")
+    parser.add_argument('--diff-file', metavar='PATH',
+                        help="with --diff, print a unified diff of one file")
+    parser.add_argument('--verify', action='store_true',
+                        help="check the project's saved assets against their recorded size and hash")
+    parser.add_argument('--repair', action='store_true',
+                        help="like --verify, then download again only the missing or corrupt assets")
+    parser.add_argument('--workers', type=int, metavar='N',
+                        help="processes hashing files for --verify/--repair (default: CPU count), "
+                             f"or concurrent HEAD requests for --plan (default {HEAD_WORKERS})")
+    parser.add_argument('--plan', action='store_true',
+                        help="dry run: size every asset with HEAD requests, write manifest.json "
+                             "and print the estimated download size and time")
+    parser.add_argument('--transport', choices=TRANSPORTS,
+                        help="HTTP version for the project's downloads, saved with the project "
+                             "(http2 needs 'pip install httpx[http2]')")
+    parser.add_argument('--concurrency', type=int, metavar='N',
+                        help="assets downloaded at once, saved with the project (default "
+                             f"{DEFAULT_CONCURRENCY['http1']} for http1, {DEFAULT_CONCURRENCY['http2']} for http2)")
+    parser.add_argument('--project', help="project to work on without the interactive menu")
+    parser.add_argument('--seed-sitemap', metavar='URL',
+                        help="add the project's URLs from a site's robots.txt/sitemaps, then exit")
+    parser.add_argument('--include', action='append', metavar='REGEX',
+                        help="only seed URLs matching this pattern (repeatable)")
+    parser.add_argument('--exclude', action='append', metavar='REGEX',
+                        help="don't seed URLs matching this pattern (repeatable)")
+    parser.add_argument('--full', action='store_true',
+                        help="ignore lastmod and seed every sitemap entry")
+    return parser.parse_args(argv)
+
+def serve_archive(root, port):
+    """Serve a mirrored folder until interrupted"""
+    import threading
+    from archive_server import start_archive_server
+    if not os.path.isdir(root):
+        print(f"Folder '{root}' not found.")
+        return
+    server = start_archive_server(root, port=port)
+    print(f"Serving {root} at {server.url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+def snapshot_command(args):
+    """List, restore or diff snapshots of --project"""
+    from snapshots import SnapshotStore
+    store = SnapshotStore(os.path.join(os.getcwd(), 'projects', args.project))
+    if args.snapshots:
+        snapshots = store.list_snapshots()
+        if not snapshots:
+            print("No snapshots found.")
+        for snapshot in snapshots:
+            label = f" [{snapshot['label']}]" if snapshot['label'] else ''
+            print(f"{snapshot['id']}{label}  {snapshot['file_count']} files, "
+                  f"{snapshot['total_bytes']} bytes, {snapshot['changed_files']} changed, "
+                  f"{snapshot['stored_bytes']} bytes stored")
+        return
+    ids = store.snapshot_ids()
+    for snapshot_id in [args.restore] if args.restore else args.diff:
+        if snapshot_id not in ids:
+            print(f"Snapshot '{snapshot_id}' not found; list them with --snapshots")
+            return
+    if args.restore:
+        written = store.restore(args.restore, clean=args.clean)
+        print(f"Restored {written} files from snapshot {args.restore}")
+    elif args.diff_file:
+        print(store.diff_file(args.diff[0], args.diff[1], args.diff_file), end='')
+    else:
+        changes = store.diff(*args.diff)
+        for kind, marker in (('added', '+'), ('removed', '-'), ('changed', '~')):
+            for path in changes[kind]:
+                print(f"{marker} {path}")
+
+def verify_command(args):
+    """Verify, and with --repair fix, the saved assets of --project"""
+    downloader = WebDownloader.load_project(args.project) or WebDownloader(args.project)
+    downloader.use_cache = not args.no_cache
+    downloader.cache_only = args.offline
+    assets = downloader.assets
+    if not len(assets):
+        print("No recorded assets; download the project first.")
+        return
+    problems = downloader.verify(args.workers)
+    for row, problem in problems:
+        print(f"{problem:10} {assets.relative_path(row)}  {assets.url(row)}")
+    print(f"{len(assets)} assets checked, {len(problems)} missing or corrupt")
+    if args.repair and problems:
+        repaired = downloader.repair(problems)
+        print(f"Repaired {repaired} of {len(problems)} assets")
+
+def plan_command(downloader, workers):
+    """Plan the project's download and print the estimate"""
+    from plan import format_duration
+    manifest = downloader.plan(workers=workers)
+    unknown = f" ({manifest['unknown_sizes']} sizes unknown, estimated)" if manifest['unknown_sizes'] else ''
+    print(f"{len(manifest['pages'])} pages, {len(manifest['assets'])} assets on "
+          f"{len(manifest['hosts'])} hosts: {manifest['total_bytes']} bytes{unknown}")
+    for host, stats in sorted(manifest['hosts'].items(), key=lambda item: -item[1]['bytes']):
+        print(f"  {host}: {stats['assets']} assets, {stats['bytes']} bytes")
+    print(f"Estimated time: {format_duration(manifest['estimated_seconds'])} at "
+          f"{manifest['bytes_per_second'] / 1024:.0f} KB/s")
+    print(f"Manifest written to {downloader.manifest_file}")
+
+def choose_project():
+    """Interactive menu to create or load a project"""
     print("\nWebSitePocket")
     print("1. Create new project")
     print("2. Load existing project")
@@ -301,7 +1140,7 @@ def main():
         projects = WebDownloader.list_projects()
         if not projects:
             print("No existing projects found.")
-            return
+            return None
         
         # Store projects in a list to maintain order
         project_list = list(projects.items())
@@ -324,7 +1163,7 @@ def main():
         downloader = WebDownloader.load_project(project_name)
         if not downloader:
             print(f"Project '{project_name}' not found.")
-            return
+            return None
     else:
         # Create new project
         project_name = input("Enter project name: ")
@@ -337,6 +1176,17 @@ def main():
         # Ask about replacing form actions
         replace_forms = input("Replace all form actions with action='#'? (y/n): ").lower().strip()
         downloader.replace_forms = replace_forms == 'y'
+
+        # Ask about bandwidth-budget mode
+        budget_mode = input("Enable bandwidth-budget mode (skip large assets)? (y/n): ").lower().strip()
+        downloader.budget_mode = budget_mode == 'y'
+        if downloader.budget_mode:
+            max_kb = input(f"Max asset size in KB [{MAX_ASSET_BYTES // 1024}]: ").strip()
+            page_kb = input(f"Byte budget per page in KB [{PAGE_BYTE_BUDGET // 1024}]: ").strip()
+            if max_kb.isdigit():
+                downloader.max_asset_bytes = int(max_kb) * 1024
+            if page_kb.isdigit():
+                downloader.page_byte_budget = int(page_kb) * 1024
         
         # Get URLs
         while True:
@@ -347,13 +1197,110 @@ def main():
         
         # Save project data
         downloader.save_project_data()
-    
+
+    return downloader
+
+def main():
+    from archive_server import precompress_directory
+    from snapshots import SnapshotStore
+    args = parse_args()
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+    if args.cache_size:
+        HttpCache.default().max_bytes = args.cache_size * 1024 * 1024
+
+    if args.seed_sitemap:
+        if not args.project:
+            print("--seed-sitemap needs --project")
+            return
+        downloader = WebDownloader.load_project(args.project) or WebDownloader(args.project)
+        downloader.seed_from_sitemap(args.seed_sitemap, include=args.include,
+                                     exclude=args.exclude, incremental=not args.full)
+        return
+
+    if args.serve or args.serve_dir:
+        root = args.serve_dir
+        if not root:
+            if not args.project:
+                print("--serve needs --project")
+                return
+            root = os.path.join(os.getcwd(), 'projects', args.project)
+        serve_archive(root, args.port)
+        return
+
+    if args.diff_file and not args.diff:
+        print("--diff-file needs --diff OLD NEW")
+        return
+    if args.clean and not args.restore:
+        print("--clean needs --restore SNAPSHOT")
+        return
+
+    if args.snapshots or args.restore or args.diff:
+        if not args.project:
+            print("Snapshot commands need --project")
+            return
+        snapshot_command(args)
+        return
+
+    if args.verify or args.repair:
+        if not args.project:
+            print("--verify/--repair need --project")
+            return
+        verify_command(args)
+        return
+
+    if args.project:
+        downloader = WebDownloader.load_project(args.project)
+        if not downloader:
+            print(f"Project '{args.project}' not found.")
+            return
+    else:
+        downloader = choose_project()
+        if not downloader:
+            return
+
+    downloader.use_cache = not args.no_cache
+    downloader.fsync = args.fsync
+    downloader.cache_only = args.offline
+    if args.transport or args.concurrency:
+        downloader.transport_name = args.transport or downloader.transport_name
+        downloader.concurrency = args.concurrency or downloader.concurrency
+        downloader.save_project_data()
+
+    if args.plan:
+        plan_command(downloader, args.workers)
+        return
+
+    # The first Ctrl+C cancels cleanly, keeping what was saved; a second one quits at once
+    import signal
+
+    def interrupt(signum, frame):
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        print("\nCancelling... (Ctrl+C again to quit immediately)")
+        downloader.cancel()
+    signal.signal(signal.SIGINT, interrupt)
+
     # Process URLs
-    for url in tqdm(downloader.urls, desc="Processing URLs"):
-        print(f"\nProcessing {url}...")
-        downloader.download_page(url)
-        print(f"Finished processing {url}")
-        print("-" * 50)
+    from tqdm import tqdm
+    try:
+        for url in tqdm(downloader.urls, desc="Processing URLs"):
+            print(f"\nProcessing {url}...")
+            downloader.download_page(url)
+            if downloader.control.cancelled:
+                print("Cancelled; run again to continue")
+                return
+            print(f"Finished processing {url}")
+            print("-" * 50)
+    finally:
+        downloader.save_assets()
+
+    # Precompressed variants for the archive server
+    precompress_directory(downloader.base_dir)
+
+    if args.snapshot is not None:
+        manifest = SnapshotStore(downloader.base_dir).create(args.snapshot or None)
+        print(f"Snapshot {manifest['id']}: {manifest['changed_files']} changed files, "
+              f"{manifest['stored_bytes']} bytes stored")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -4,17 +4,20 @@ import os
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QPushButton, QLineEdit, QTextEdit, 
                             QLabel, QComboBox, QCheckBox, QProgressBar, 
-                            QMessageBox, QFileDialog, QInputDialog, QTableWidget,
-                            QTableWidgetItem, QHeaderView, QSizePolicy)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
-from PyQt5.QtGui import QIcon, QFontDatabase, QFont, QColor
+                            QMessageBox, QFileDialog, QInputDialog, QTableView,
+                            QAbstractItemView, QHeaderView, QSizePolicy)
+from PyQt5.QtCore import (Qt, QThread, QTimer, pyqtSignal, QAbstractTableModel,
+                          QModelIndex, QSortFilterProxyModel)
+from PyQt5.QtGui import QIcon, QFontDatabase, QFont, QColor, QBrush
 from download import WebDownloader
+from catalog import ProjectCatalog
 from translations import TRANSLATIONS
 
 class DownloaderThread(QThread):
     progress = pyqtSignal(int, int)  # current, total
     file_progress = pyqtSignal(int, int, str)  # current, total, filename
     url_completed = pyqtSignal(int)  # row index
+    url_failed = pyqtSignal(int)  # row index, page or some of its assets not saved
     status = pyqtSignal(str)
     finished = pyqtSignal()
     error = pyqtSignal(str, int)  # error message, row index
@@ -26,6 +29,17 @@ class DownloaderThread(QThread):
         self.current_row = current_row
         self.is_running = True
 
+    def stop(self):
+        """Cancel the download; run() returns shortly after, keeping what was saved"""
+        self.is_running = False
+        self.downloader.cancel()
+
+    def pause(self):
+        self.downloader.pause()
+
+    def resume(self):
+        self.downloader.resume()
+
     def run(self):
         try:
             url = self.urls[self.current_row]
@@ -39,13 +53,146 @@ class DownloaderThread(QThread):
             
             self.downloader.set_progress_callback(progress_callback)
             self.downloader.set_file_callback(file_callback)
-            self.downloader.download_page(url)
-            
-            self.url_completed.emit(self.current_row)
+            if self.downloader.download_page(url):
+                self.url_completed.emit(self.current_row)
+            else:
+                self.url_failed.emit(self.current_row)
             self.finished.emit()
         except Exception as e:
             self.error.emit(str(e), self.current_row)
 
+class SitemapThread(QThread):
+    done = pyqtSignal(int)  # number of URLs added
+    error = pyqtSignal(str)
+
+    def __init__(self, downloader, url):
+        super().__init__()
+        self.downloader = downloader
+        self.url = url
+
+    def run(self):
+        try:
+            self.done.emit(self.downloader.seed_from_sitemap(self.url))
+        except Exception as e:
+            self.error.emit(str(e))
+
+class PlanThread(QThread):
+    done = pyqtSignal(dict)  # manifest
+    error = pyqtSignal(str)
+
+    def __init__(self, downloader):
+        super().__init__()
+        self.downloader = downloader
+
+    def run(self):
+        try:
+            self.done.emit(self.downloader.plan())
+        except Exception as e:
+            self.error.emit(str(e))
+
+class UrlTableModel(QAbstractTableModel):
+    """Virtual two-column (status, URL) model for the URLs table.
+
+    Rows only hold the URL string and a one-byte status code; icons, fonts
+    and brushes are shared and resolved in data(), so the view only pays
+    for the rows it actually paints.
+    """
+    STATUSES = ('default', 'waiting', 'completed', 'done', 'failed')
+
+    def __init__(self, icons, colors, font, parent=None):
+        super().__init__(parent)
+        self._urls = []
+        self._status = bytearray()
+        self._headers = ['', '']
+        self._icons = [icons.get(status, icons['completed']) for status in self.STATUSES]
+        self._brushes = [QBrush(QColor(colors[status])) for status in self.STATUSES]
+        self._font = font
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._urls)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 2
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        if role == Qt.DisplayRole:
+            return self._icons[self._status[row]] if column == 0 else self._urls[row]
+        if role == Qt.BackgroundRole:
+            return self._brushes[self._status[row]]
+        if column == 0:
+            if role == Qt.FontRole:
+                return self._font
+            if role == Qt.TextAlignmentRole:
+                return Qt.AlignCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self._headers[section]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        # Read-only table
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def set_headers(self, labels):
+        self._headers = list(labels)
+        self.headerDataChanged.emit(Qt.Horizontal, 0, 1)
+
+    def set_font(self, font):
+        self._font = font
+        self._emit_changed(0, len(self._urls) - 1)
+
+    def set_urls(self, urls):
+        """Replace all rows in one reset instead of inserting row by row"""
+        self.beginResetModel()
+        self._urls = list(urls)
+        self._status = bytearray(len(self._urls))
+        self.endResetModel()
+
+    def append_url(self, url):
+        row = len(self._urls)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._urls.append(url)
+        self._status.append(0)
+        self.endInsertRows()
+
+    def urls(self):
+        return list(self._urls)
+
+    def set_status(self, row, status):
+        self.set_status_range(row, row, status)
+
+    def set_status_range(self, first, last, status):
+        """Set the status of rows first..last and notify the view once"""
+        last = min(last, len(self._urls) - 1)
+        if first > last:
+            return
+        code = self.STATUSES.index(status)
+        self._status[first:last + 1] = bytes([code]) * (last - first + 1)
+        self._emit_changed(first, last)
+
+    def status(self, row):
+        return self.STATUSES[self._status[row]]
+
+    def set_all_status(self, status, keep=()):
+        """Set every row to status, except rows whose status is in keep"""
+        if not keep:
+            self.set_status_range(0, len(self._urls) - 1, status)
+            return
+        code = self.STATUSES.index(status)
+        kept = {self.STATUSES.index(name) for name in keep}
+        table = bytes(value if value in kept else code for value in range(256))
+        self._status = bytearray(self._status.translate(table))
+        self._emit_changed(0, len(self._urls) - 1)
+
+    def _emit_changed(self, first, last):
+        if first <= last:
+            self.dataChanged.emit(self.index(first, 0), self.index(last, 1))
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -54,23 +201,29 @@ class MainWindow(QMainWindow):
         self.setWindowTitle(self.tr['title'])
         self.setMinimumSize(600, 400)
         self.downloading = False
+        self.catalog = ProjectCatalog.default()
+        self.preview_servers = {}
         self.setup_font_awesome()
         self.STATUS_COLORS = {
             'default': '#FFFFFF',    # white
             'waiting': '#FFE599',    # light yellow
             'completed': '#90EE90',  # light green
             'done': '#E0E0E0',       # light gray
+            'failed': '#FFB3B3',     # light red
         }
         self.setup_ui()
-        self.load_projects()
         # Set app icon
         self.setWindowIcon(QIcon(os.path.join(os.path.dirname(__file__), 'icons', 'icon.png')))
+        # Defer the font file and projects.json until the window is painted
+        QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        """Load the work skipped in __init__ once the event loop is running"""
+        self.load_font_awesome()
+        self.load_projects()
 
     def setup_font_awesome(self):
-        # Load Font Awesome
-        font_id = QFontDatabase.addApplicationFont(os.path.join(os.path.dirname(__file__), 'fonts', 'fa-solid-900.ttf'))
-        if font_id < 0:
-            print("Error loading Font Awesome")
+        # The TTF itself is registered later by load_font_awesome()
         self.fa_font = QFont('Font Awesome 6 Free Solid', 10)
         
         # Define Font Awesome icons
@@ -78,14 +231,29 @@ class MainWindow(QMainWindow):
             'default': '\uf111',    # circle
             'waiting': '\uf254',    # hourglass
             'completed': '\uf00c',  # check
+            'done': '\uf00c',       # check
+            'failed': '\uf00d',     # xmark
         }
 
         # Add button icons
         self.BUTTON_ICONS = {
             'download': '\uf019',  # download icon
             'abort': '\uf05e',    # ban/stop icon
+            'pause': '\uf04c',
+            'resume': '\uf04b',   # play icon
         }
 
+    def load_font_awesome(self):
+        """Register the Font Awesome TTF and re-apply it to the icon buttons"""
+        font_id = QFontDatabase.addApplicationFont(os.path.join(os.path.dirname(__file__), 'fonts', 'fa-solid-900.ttf'))
+        if font_id < 0:
+            print("Error loading Font Awesome")
+        self.fa_font = QFont('Font Awesome 6 Free Solid', 10)
+        self.download_btn.setFont(self.fa_font)
+        self.pause_btn.setFont(self.fa_font)
+        self.abort_btn.setFont(self.fa_font)
+        self.urls_model.set_font(self.fa_font)
+
     def setup_ui(self):
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -111,12 +279,32 @@ class MainWindow(QMainWindow):
         self.add_url_btn = QPushButton(self.tr['add_url'])
         self.add_url_btn.clicked.connect(self.add_url)
         url_layout.addWidget(self.add_url_btn)
+        self.import_sitemap_btn = QPushButton(self.tr['import_sitemap'])
+        self.import_sitemap_btn.clicked.connect(self.import_sitemap)
+        url_layout.addWidget(self.import_sitemap_btn)
+
+        self.plan_btn = QPushButton(self.tr['estimate'])
+        self.plan_btn.clicked.connect(self.plan_download)
+        url_layout.addWidget(self.plan_btn)
         layout.addLayout(url_layout)
 
-        # URLs list - replace QTextEdit with QTableWidget
-        self.urls_table = QTableWidget()
-        self.urls_table.setColumnCount(2)
-        self.urls_table.setHorizontalHeaderLabels([self.tr['status'], self.tr['url']])
+        # URLs filter
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText(self.tr['filter_urls'])
+        self.filter_input.setClearButtonEnabled(True)
+        layout.addWidget(self.filter_input)
+
+        # URLs list - virtual model, only visible rows are rendered
+        self.urls_model = UrlTableModel(self.STATUS_ICONS, self.STATUS_COLORS, self.fa_font, self)
+        self.urls_model.set_headers([self.tr['status'], self.tr['url']])
+        self.urls_proxy = QSortFilterProxyModel(self)
+        self.urls_proxy.setSourceModel(self.urls_model)
+        self.urls_proxy.setFilterKeyColumn(1)
+        self.urls_proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.filter_input.textChanged.connect(self.urls_proxy.setFilterFixedString)
+        self.urls_table = QTableView()
+        self.urls_table.setModel(self.urls_proxy)
+        self.urls_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         # Always set status column to 50px regardless of language
         if self.current_lang == 'ar':
             self.urls_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Fixed)
@@ -126,7 +314,7 @@ class MainWindow(QMainWindow):
             self.urls_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Fixed)
             self.urls_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
             self.urls_table.setColumnWidth(0, 50)  # Status column is first column in LTR
-        self.urls_table.setEditTriggers(QTableWidget.NoEditTriggers)  # Make table uneditable
+        self.urls_table.setEditTriggers(QAbstractItemView.NoEditTriggers)  # Make table uneditable
         layout.addWidget(self.urls_table)
 
         # Options
@@ -135,6 +323,10 @@ class MainWindow(QMainWindow):
         options_layout.addWidget(self.replace_links_cb)
         self.replace_forms_cb = QCheckBox(self.tr['replace_forms'])
         options_layout.addWidget(self.replace_forms_cb)
+        self.budget_mode_cb = QCheckBox(self.tr['budget_mode'])
+        options_layout.addWidget(self.budget_mode_cb)
+        self.http2_cb = QCheckBox(self.tr['use_http2'])
+        options_layout.addWidget(self.http2_cb)
         layout.addLayout(options_layout)
 
         # Progress
@@ -192,6 +384,20 @@ class MainWindow(QMainWindow):
         """)
         self.download_btn.clicked.connect(self.start_download)
         buttons_container_layout.addWidget(self.download_btn, 1)  # 1 for stretch factor
+
+        self.pause_btn = QPushButton(f"{self.BUTTON_ICONS['pause']} {self.tr['pause']}")
+        self.pause_btn.setFont(self.fa_font)
+        self.pause_btn.setMinimumHeight(50)
+        self.pause_btn.setStyleSheet("""
+            QPushButton {
+                font-size: 14px;
+                padding: 5px 10px;
+                min-width: 150px;
+            }
+        """)
+        self.pause_btn.clicked.connect(self.toggle_pause)
+        self.pause_btn.setEnabled(False)
+        buttons_container_layout.addWidget(self.pause_btn, 1)  # 1 for stretch factor
         
         self.abort_btn = QPushButton(f"{self.BUTTON_ICONS['abort']} {self.tr['abort']}")
         self.abort_btn.setFont(self.fa_font)
@@ -238,29 +444,25 @@ class MainWindow(QMainWindow):
         self.setWindowTitle(self.tr['title'])
         self.new_project_btn.setText(self.tr['new_project'])
         self.url_input.setPlaceholderText(self.tr['enter_url'])
+        self.filter_input.setPlaceholderText(self.tr['filter_urls'])
         self.add_url_btn.setText(self.tr['add_url'])
+        self.import_sitemap_btn.setText(self.tr['import_sitemap'])
+        self.plan_btn.setText(self.tr['estimate'])
         self.replace_links_cb.setText(self.tr['replace_links'])
         self.replace_forms_cb.setText(self.tr['replace_forms'])
+        self.budget_mode_cb.setText(self.tr['budget_mode'])
+        self.http2_cb.setText(self.tr['use_http2'])
         self.download_btn.setText(f"{self.BUTTON_ICONS['download']} {self.tr['start_download']}")
+        self.set_pause_button()
         self.abort_btn.setText(f"{self.BUTTON_ICONS['abort']} {self.tr['abort']}")
         self.browse_btn.setText(self.tr['browse'])
         self.progress_label.setText(self.tr['ready'])
         self.file_label.setText(f"{self.tr['current_file']}{self.tr['none']}")
         self.time_label.setText(f"{self.tr['time_remain']}: --:--")  # Update time label
-        self.urls_table.setHorizontalHeaderLabels([self.tr['status'], self.tr['url']])  # Update table headers
+        self.urls_model.set_headers([self.tr['status'], self.tr['url']])  # Update table headers
 
-        # Update project combo items
-        current_item = self.project_combo.currentText()
-        self.project_combo.clear()
-        self.project_combo.addItem(self.tr['create_new_project'])
-        projects = WebDownloader.list_projects()
-        for name in projects.keys():
-            self.project_combo.addItem(name)
-            
-        # Try to restore previous selection
-        index = self.project_combo.findText(current_item)
-        if index >= 0:
-            self.project_combo.setCurrentIndex(index)
+        # Only the placeholder entry is translated; project names stay as they are
+        self.project_combo.setItemText(0, self.tr['create_new_project'])
 
     def change_language(self, lang_text):
         self.current_lang = 'ar' if lang_text == 'العربية' else 'en'
@@ -291,26 +493,41 @@ class MainWindow(QMainWindow):
         self.retranslate_ui()
 
     def browse_projects(self):
+        """Preview the selected project in the browser, or open the projects folder"""
         project_dir = os.path.join(os.getcwd(), 'projects')
+        project_name = self.project_combo.currentText()
+        if self.project_combo.currentIndex() > 0 and os.path.isdir(os.path.join(project_dir, project_name)):
+            server = self.preview_servers.get(project_name)
+            if server is None:
+                from archive_server import start_archive_server
+                server = start_archive_server(os.path.join(project_dir, project_name))
+                self.preview_servers[project_name] = server
+            import webbrowser
+            webbrowser.open(server.url)
+            return
         os.startfile(project_dir) if os.name == 'nt' else os.system(f'xdg-open "{project_dir}"')
 
     def load_projects(self):
         self.project_combo.clear()
         self.project_combo.addItem(self.tr['create_new_project'])
-        projects = WebDownloader.list_projects()
-        for name in projects.keys():
-            self.project_combo.addItem(name)
+        self.project_combo.addItems(self.catalog.names())
         self.project_combo.currentTextChanged.connect(self.on_project_selected)
 
+    def show_project(self, project):
+        """Fill the URLs table and options from a catalog ProjectInfo"""
+        self.set_urls(project.urls)
+        self.replace_links_cb.setChecked(project.replace_links)
+        self.replace_forms_cb.setChecked(project.replace_forms)
+        self.budget_mode_cb.setChecked(project.budget_mode)
+        self.http2_cb.setChecked(project.transport == 'http2')
+
     def on_project_selected(self, project_name):
-        if project_name != self.tr['create_new_project']:
-            existing_project = WebDownloader.load_project(project_name)
-            if existing_project:
-                self.set_urls(existing_project.urls)
-                self.replace_links_cb.setChecked(existing_project.replace_links)
-                self.replace_forms_cb.setChecked(existing_project.replace_forms)
+        if self.project_combo.currentIndex() > 0:
+            project = self.catalog.get(project_name)
+            if project:
+                self.show_project(project)
         else:
-            self.urls_table.setRowCount(0)
+            self.urls_model.set_urls([])
 
     def create_new_project(self):
         project_name, ok = QInputDialog.getText(self, self.tr['new_project'], self.tr['enter_project_name'])
@@ -332,56 +549,105 @@ class MainWindow(QMainWindow):
             
             # Reset URLs table for new project
             if not os.path.exists(project_dir):
-                self.urls_table.setRowCount(0)
+                self.urls_model.set_urls([])
                 self.replace_links_cb.setChecked(False)
                 self.replace_forms_cb.setChecked(False)
+                self.budget_mode_cb.setChecked(False)
+                self.http2_cb.setChecked(False)
 
             # Load existing URLs if project exists
-            existing_project = WebDownloader.load_project(project_name)
+            existing_project = self.catalog.get(project_name)
             if existing_project:
-                self.set_urls(existing_project.urls)
-                self.replace_links_cb.setChecked(existing_project.replace_links)
-                self.replace_forms_cb.setChecked(existing_project.replace_forms)
+                self.show_project(existing_project)
 
     def set_status_item(self, row, status):
         """Set status icon and background colors for a row"""
-        # Set status icon
-        status_item = QTableWidgetItem(self.STATUS_ICONS[status])
-        status_item.setFont(self.fa_font)
-        status_item.setTextAlignment(Qt.AlignCenter)
-        self.urls_table.setItem(row, 0, status_item)
-        
-        # Set background colors
-        if status in self.STATUS_COLORS:
-            # Set status column background
-            self.urls_table.item(row, 0).setBackground(QColor(self.STATUS_COLORS[status]))
-            # Set URL column background only if item exists
-            url_item = self.urls_table.item(row, 1)
-            if url_item:
-                url_item.setBackground(QColor(self.STATUS_COLORS[status]))
+        self.urls_model.set_status(row, status)
 
     def add_url(self):
         url = self.url_input.text().strip()
         if url:
-            row = self.urls_table.rowCount()
-            self.urls_table.insertRow(row)
-            self.set_status_item(row, 'default')
-            self.urls_table.setItem(row, 1, QTableWidgetItem(url))
+            self.urls_model.append_url(url)
             self.url_input.clear()
 
+    def import_sitemap(self):
+        """Seed the project's URLs from a site's robots.txt/sitemaps in the background"""
+        project_name = self.project_combo.currentText()
+        if self.project_combo.currentIndex() == 0:
+            QMessageBox.warning(self, self.tr['error'], self.tr['select_project'])
+            return
+        url, ok = QInputDialog.getText(self, self.tr['import_sitemap'], self.tr['enter_sitemap_url'])
+        if not ok or not url.strip():
+            return
+
+        downloader = WebDownloader.load_project(project_name) or WebDownloader(project_name)
+        downloader.urls = self.get_urls()
+        downloader.replace_links = self.replace_links_cb.isChecked()
+        downloader.replace_forms = self.replace_forms_cb.isChecked()
+        downloader.budget_mode = self.budget_mode_cb.isChecked()
+        downloader.transport_name = 'http2' if self.http2_cb.isChecked() else 'http1'
+
+        self.import_sitemap_btn.setEnabled(False)
+        self.progress_label.setText(self.tr['importing_sitemap'])
+        self.sitemap_thread = SitemapThread(downloader, url.strip())
+        self.sitemap_thread.done.connect(self.sitemap_imported)
+        self.sitemap_thread.error.connect(self.sitemap_failed)
+        self.sitemap_thread.start()
+
+    def sitemap_imported(self, added):
+        self.import_sitemap_btn.setEnabled(True)
+        self.progress_label.setText(self.tr['sitemap_imported'].format(added))
+        # The seeder saved the project; reload it in one model reset
+        project = self.catalog.get(self.project_combo.currentText())
+        if project:
+            self.show_project(project)
+
+    def sitemap_failed(self, message):
+        self.import_sitemap_btn.setEnabled(True)
+        self.progress_label.setText(self.tr['ready'])
+        QMessageBox.critical(self, self.tr['error'], message)
+
+    def plan_download(self):
+        """Dry run in the background: size every asset and save the project's manifest"""
+        project_name = self.project_combo.currentText()
+        if self.project_combo.currentIndex() == 0:
+            QMessageBox.warning(self, self.tr['error'], self.tr['select_project'])
+            return
+        if not self.get_urls():
+            QMessageBox.warning(self, self.tr['error'], self.tr['add_urls'])
+            return
+
+        downloader = WebDownloader(project_name)
+        downloader.urls = self.get_urls()
+        downloader.budget_mode = self.budget_mode_cb.isChecked()
+        downloader.transport_name = 'http2' if self.http2_cb.isChecked() else 'http1'
+
+        self.plan_btn.setEnabled(False)
+        self.progress_label.setText(self.tr['planning'])
+        self.plan_thread = PlanThread(downloader)
+        self.plan_thread.done.connect(self.plan_ready)
+        self.plan_thread.error.connect(self.plan_failed)
+        self.plan_thread.start()
+
+    def plan_ready(self, manifest):
+        from plan import format_duration
+        self.plan_btn.setEnabled(True)
+        self.progress_label.setText(self.tr['ready'])
+        QMessageBox.information(self, self.tr['estimate'], self.tr['plan_summary'].format(
+            pages=len(manifest['pages']), assets=len(manifest['assets']),
+            hosts=len(manifest['hosts']), size=f"{manifest['total_bytes'] / 1024 / 1024:.1f} MB",
+            unknown=manifest['unknown_sizes'], time=format_duration(manifest['estimated_seconds'])))
+
+    def plan_failed(self, message):
+        self.plan_btn.setEnabled(True)
+        self.progress_label.setText(self.tr['ready'])
+        QMessageBox.critical(self, self.tr['error'], message)
+
     def get_urls(self):
-        urls = []
-        for row in range(self.urls_table.rowCount()):
-            urls.append(self.urls_table.item(row, 1).text())
-        return urls
+        return self.urls_model.urls()
 
     def set_urls(self, urls):
-        self.urls_table.setRowCount(0)
-        for url in urls:
-            row = self.urls_table.rowCount()
-            self.urls_table.insertRow(row)
-            self.set_status_item(row, 'default')
-            self.urls_table.setItem(row, 1, QTableWidgetItem(url))
+        self.urls_model.set_urls(urls)
 
     def start_download(self):
         if self.downloading:
@@ -394,6 +660,7 @@ class MainWindow(QMainWindow):
         self.new_project_btn.setEnabled(False)
         self.url_input.setEnabled(False)
         self.add_url_btn.setEnabled(False)
+        self.import_sitemap_btn.setEnabled(False)
         
         project_name = self.project_combo.currentText()
         if project_name == self.tr['create_new_project']:
@@ -419,9 +686,13 @@ class MainWindow(QMainWindow):
                 return
 
         # Initialize downloader
-        self.downloader = WebDownloader(project_name)
+        # Saved settings the window has no control for (budgets, concurrency,
+        # sitemap lastmod) carry over from the project
+        self.downloader = WebDownloader.load_project(project_name) or WebDownloader(project_name)
         self.downloader.replace_links = self.replace_links_cb.isChecked()
         self.downloader.replace_forms = self.replace_forms_cb.isChecked()
+        self.downloader.budget_mode = self.budget_mode_cb.isChecked()
+        self.downloader.transport_name = 'http2' if self.http2_cb.isChecked() else 'http1'
         self.downloader.urls = self.urls
 
         # Save project data
@@ -434,22 +705,19 @@ class MainWindow(QMainWindow):
         self.time_label.setText(self.tr["time_remain"] + ": --:--")
 
         # Set all URLs to waiting status except first one
-        for row in range(self.urls_table.rowCount()):
-            if row == 0:  # First URL
-                self.set_status_item(row, 'completed')  # Mark as active/downloading
-                self.urls_table.item(row, 0).setBackground(QColor('#90EE90'))  # Light green
-                self.urls_table.item(row, 1).setBackground(QColor('#90EE90'))
-            else:
-                self.set_status_item(row, 'waiting')
-                self.urls_table.item(row, 0).setBackground(QColor('#FFE599'))  # Light yellow
-                self.urls_table.item(row, 1).setBackground(QColor('#FFE599'))
+        self.urls_model.set_all_status('waiting')
+        self.set_status_item(0, 'completed')  # Mark as active/downloading
 
         # Start downloading first URL
         self.current_row = 0
+        self.aborting = False
+        self.paused_at = None
         self.start_url_download()
         
         self.downloading = True
         self.download_btn.setEnabled(False)
+        self.set_pause_button()
+        self.pause_btn.setEnabled(True)
         self.abort_btn.setEnabled(True)
 
     def start_url_download(self):
@@ -462,6 +730,7 @@ class MainWindow(QMainWindow):
         self.thread.file_progress.connect(self.update_file_progress)
         self.thread.status.connect(self.update_status)
         self.thread.url_completed.connect(self.url_completed)
+        self.thread.url_failed.connect(self.url_failed)
         self.thread.finished.connect(self.check_next_url)
         self.thread.error.connect(self.handle_error)
         self.thread.start()
@@ -470,35 +739,74 @@ class MainWindow(QMainWindow):
         """Mark URL as completed"""
         self.set_status_item(row, 'completed')
 
+    def url_failed(self, row):
+        """Mark URL as not fully downloaded"""
+        self.set_status_item(row, 'failed')
+
     def handle_error(self, error_msg, row):
         """Handle error for specific URL"""
+        self.set_status_item(row, 'failed')
         QMessageBox.critical(self, self.tr['error'], f"Error downloading {self.urls[row]}: {error_msg}")
         self.check_next_url()
 
     def check_next_url(self):
         """Check if there are more URLs to download"""
+        if self.aborting:
+            self.download_aborted()
+            return
+
         # Mark current URL as completed with gray background
-        self.set_status_item(self.current_row, 'completed')
-        self.urls_table.item(self.current_row, 0).setBackground(QColor(self.STATUS_COLORS['done']))
-        self.urls_table.item(self.current_row, 1).setBackground(QColor(self.STATUS_COLORS['done']))
+        if self.urls_model.status(self.current_row) != 'failed':
+            self.set_status_item(self.current_row, 'done')
         
         self.current_row += 1
         if self.current_row < len(self.urls):
             # Highlight new current URL
-            self.urls_table.item(self.current_row, 0).setBackground(QColor(self.STATUS_COLORS['completed']))
-            self.urls_table.item(self.current_row, 1).setBackground(QColor(self.STATUS_COLORS['completed']))
+            self.set_status_item(self.current_row, 'completed')
             self.start_url_download()
         else:
             self.download_finished()
 
     def abort_download(self):
-        if hasattr(self, 'thread'):
+        if self.downloading and hasattr(self, 'thread'):
+            self.aborting = True
             self.thread.stop()
             self.abort_btn.setEnabled(False)
-            self.progress_label.setText("Aborting...")
+            self.pause_btn.setEnabled(False)
+            self.progress_label.setText(self.tr['aborting'])
+
+    def toggle_pause(self):
+        """Pause or resume the running download; nothing already fetched is fetched again"""
+        if self.paused_at is None:
+            self.thread.pause()
+            self.paused_at = time.time()
+            self.status_before_pause = self.progress_label.text()
+            self.progress_label.setText(self.tr['paused'])
+        else:
+            # Time spent paused doesn't count towards the remaining-time estimate
+            self.start_time += time.time() - self.paused_at
+            self.paused_at = None
+            self.thread.resume()
+            self.progress_label.setText(self.status_before_pause)
+        self.set_pause_button()
+
+    def set_pause_button(self):
+        key = 'pause' if getattr(self, 'paused_at', None) is None else 'resume'
+        self.pause_btn.setText(f"{self.BUTTON_ICONS[key]} {self.tr[key]}")
+
+    def download_aborted(self):
+        """Finish an aborted download; URLs it didn't get to go back to their initial state"""
+        for row in range(self.current_row, len(self.urls)):
+            self.set_status_item(row, 'default')
+        self.downloader.save_assets()
+        self.reset_controls()
+        self.progress_label.setText(self.tr['download_aborted'])
 
     def update_progress(self, current, total):
         if total > 0:  # Prevent division by zero
+            if total > 2 ** 31 - 1:
+                # Planned runs report bytes, which can overflow the progress bar's int range
+                current, total = current * 10000 // total, 10000
             self.progress_bar.setMaximum(total)
             self.progress_bar.setValue(current)
             
@@ -550,9 +858,11 @@ class MainWindow(QMainWindow):
     def update_status(self, message):
         self.progress_label.setText(message)
 
-    def download_finished(self):
+    def reset_controls(self):
+        """Re-enable the controls disabled while downloading and clear the progress"""
         self.downloading = False
         self.download_btn.setEnabled(True)
+        self.pause_btn.setEnabled(False)
         self.abort_btn.setEnabled(False)
         
         # Re-enable controls
@@ -561,23 +871,42 @@ class MainWindow(QMainWindow):
         self.new_project_btn.setEnabled(True)
         self.url_input.setEnabled(True)
         self.add_url_btn.setEnabled(True)
+        self.import_sitemap_btn.setEnabled(True)
         
-        self.progress_label.setText("Download completed!")
         self.progress_bar.setValue(0)
         self.file_progress.setValue(0)
         self.file_label.setText(f"{self.tr['current_file']}{self.tr['none']}")
         self.time_label.setText(self.tr["time_remain"] + ": <b>--:--</b>")
+
+    def download_finished(self):
+        self.downloader.save_assets()
+        self.reset_controls()
+        self.progress_label.setText("Download completed!")
         # Update all status icons to finished
-        for row in range(self.urls_table.rowCount()):
-            self.set_status_item(row, 'completed')
-        QMessageBox.information(self, self.tr['success'], self.tr['download_completed'])
+        self.urls_model.set_all_status('completed', keep=('failed',))
+        failed = sum(1 for row in range(self.urls_model.rowCount())
+                     if self.urls_model.status(row) == 'failed')
+        if failed:
+            QMessageBox.warning(self, self.tr['warning'], self.tr['download_incomplete'].format(
+                failed, self.downloader.project_name))
+        else:
+            QMessageBox.information(self, self.tr['success'], self.tr['download_completed'])
 
     def show_error(self, message):
         self.downloading = False
         self.download_btn.setEnabled(True)
+        self.pause_btn.setEnabled(False)
         self.abort_btn.setEnabled(False)
         QMessageBox.critical(self, "Error", f"Download failed: {message}")
 
+    def closeEvent(self, event):
+        """Cancel a running download so its thread has ended before the window closes"""
+        if self.downloading and hasattr(self, 'thread'):
+            self.aborting = True
+            self.thread.stop()
+            self.thread.wait()
+        super().closeEvent(event)
+
     def open_git_project(self):
         """Open the GitHub repository in default browser"""
         repo_url = "https://github.com/magdy-ragab/WebSitePocket"
@@ -585,6 +914,10 @@ class MainWindow(QMainWindow):
         webbrowser.open(repo_url)
 
 if __name__ == '__main__':
+    # Opt-in Prometheus endpoint: python downloader_gui.py --metrics-port 9100
+    if '--metrics-port' in sys.argv:
+        from metrics import start_metrics_server
+        start_metrics_server(int(sys.argv[sys.argv.index('--metrics-port') + 1]))
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
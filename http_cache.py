@@ -0,0 +1,283 @@
+import os
+import time
+import shutil
+import hashlib
+import threading
+
+# Total size of cached bodies before least recently used entries are evicted
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+# Eviction goes down to this fraction of max_bytes, so that it runs once
+# per tenth of the cache stored rather than on every store
+LOW_WATER = 0.9
+
+# Index changes (stores, last access times) written per SQLite commit; the
+# rest are committed by flush(), at the latest when the process exits
+COMMIT_EVERY = 64
+
+# Heuristic freshness (RFC 9111 4.2.2): a fraction of the Last-Modified age, capped
+HEURISTIC_FRACTION = 0.1
+HEURISTIC_MAX_AGE = 24 * 60 * 60
+
+
+def parse_cache_control(value):
+    """Parse a Cache-Control header into {directive: value or True}"""
+    directives = {}
+    for part in (value or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, arg = part.partition('=')
+        directives[name.strip().lower()] = arg.strip().strip('"') if arg else True
+    return directives
+
+
+def _http_date(value):
+    from email.utils import parsedate_to_datetime
+    try:
+        return parsedate_to_datetime(value).timestamp() if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _int(value, default=0):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def freshness_lifetime(headers, now):
+    """Return how long a response stays fresh from now, or None if it must not be stored"""
+    cache_control = parse_cache_control(headers.get('cache-control'))
+    if 'no-store' in cache_control:
+        return None
+    vary = headers.get('vary', '').lower()
+    if vary and vary.strip() not in ('accept-encoding', 'origin'):
+        # Requests are always sent with the same headers, but other variants
+        # could belong to other clients; don't guess
+        return None
+    if 'no-cache' in cache_control:
+        return 0
+
+    age = _int(headers.get('age'))
+    if 'max-age' in cache_control:
+        return max(0, _int(cache_control['max-age']) - age)
+
+    date = _http_date(headers.get('date')) or now
+    expires = headers.get('expires')
+    if expires is not None:
+        expires_at = _http_date(expires)
+        return max(0, expires_at - date - age) if expires_at else 0
+
+    last_modified = _http_date(headers.get('last-modified'))
+    if last_modified and last_modified < date:
+        return min(HEURISTIC_MAX_AGE, (date - last_modified) * HEURISTIC_FRACTION)
+    return 0
+
+
+class HttpCache:
+    """On-disk HTTP response cache shared by all projects.
+
+    Bodies live under cache_dir in files named after the URL hash; an SQLite
+    index keeps validators, expiry and last access time. The total size of
+    bodies is kept under max_bytes by evicting the least recently used.
+    Index updates are batched into few commits on a WAL journal, since the
+    cache is written once per downloaded asset.
+    """
+
+    _instances = {}
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stored': 0,
+                      'evicted': 0, 'bytes_saved': 0}
+        os.makedirs(cache_dir, exist_ok=True)
+        import sqlite3
+        self.db = sqlite3.connect(os.path.join(cache_dir, 'index.sqlite'),
+                                  check_same_thread=False, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires REAL NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                last_access REAL NOT NULL
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access)")
+        self.db.commit()
+        self.touched = {}     # key -> last access time not yet written to the index
+        self.uncommitted = 0  # index changes since the last commit
+        self.total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        import atexit
+        atexit.register(self.flush)
+
+    @classmethod
+    def default(cls):
+        """Shared cache under projects/.cache in the current directory"""
+        cache_dir = os.path.join(os.getcwd(), 'projects', '.cache')
+        cache = cls._instances.get(cache_dir)
+        if cache is None:
+            cache = cls._instances[cache_dir] = cls(cache_dir)
+        return cache
+
+    def _key(self, url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def body_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def lookup(self, url):
+        """Return the index entry for url as a dict, or None"""
+        key = self._key(url)
+        with self.lock:
+            row = self.db.execute(
+                "SELECT size, expires, etag, last_modified FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or not os.path.exists(self.body_path(key)):
+            return None
+        size, expires, etag, last_modified = row
+        return {'key': key, 'url': url, 'size': size, 'expires': expires,
+                'etag': etag, 'last_modified': last_modified}
+
+    def is_fresh(self, entry):
+        return entry['expires'] > time.time()
+
+    def conditional_headers(self, entry):
+        """Validators for revalidating a stale entry"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def read(self, entry):
+        """Return a cached body as bytes and count it as a hit"""
+        with open(self.body_path(entry['key']), 'rb') as f:
+            data = f.read()
+        self.hit(entry)
+        return data
+
+    def hit(self, entry):
+        """Mark entry as recently used and count it as a hit"""
+        with self.lock:
+            self.touched[entry['key']] = time.time()
+            self._changed()
+            self.stats['hits'] += 1
+            self.stats['bytes_saved'] += entry['size']
+
+    def revalidated(self, entry, headers):
+        """Extend an entry's freshness after a 304 Not Modified"""
+        now = time.time()
+        lifetime = freshness_lifetime(headers, now) or 0
+        with self.lock:
+            self.db.execute(
+                "UPDATE entries SET expires = ?, etag = COALESCE(?, etag) WHERE key = ?",
+                (now + lifetime, headers.get('etag'), entry['key'])
+            )
+            self._changed()
+            self.stats['revalidated'] += 1
+
+    def miss(self):
+        with self.lock:
+            self.stats['misses'] += 1
+
+    def store_file(self, url, status_code, headers, src_path=None, data=None):
+        """Store a downloaded body (a file at src_path, or bytes) if the response is storable"""
+        now = time.time()
+        lifetime = freshness_lifetime(headers, now)
+        if status_code != 200 or lifetime is None:
+            return False
+        if not (lifetime > 0 or headers.get('etag') or headers.get('last-modified')):
+            # Neither fresh nor revalidatable: storing it would never help
+            return False
+
+        key = self._key(url)
+        path = self.body_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        if data is None:
+            # Files are only ever replaced, never rewritten in place, so the
+            # cache can share the downloaded file instead of copying it
+            try:
+                os.link(src_path, tmp_path)
+            except OSError:
+                shutil.copyfile(src_path, tmp_path)
+        else:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+        os.replace(tmp_path, path)
+        size = os.path.getsize(path)
+
+        with self.lock:
+            old = self.db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, url, size, now + lifetime, headers.get('etag'),
+                 headers.get('last-modified'), now)
+            )
+            self.touched.pop(key, None)
+            self.total += size - (old[0] if old else 0)
+            self._changed()
+            self.stats['stored'] += 1
+        if self.total > self.max_bytes:
+            self.evict()
+        return True
+
+    def _changed(self):
+        """Count an index change, committing every COMMIT_EVERY of them (lock held)"""
+        self.uncommitted += 1
+        if self.uncommitted >= COMMIT_EVERY:
+            self._commit()
+
+    def _commit(self):
+        if self.touched:
+            self.db.executemany("UPDATE entries SET last_access = ? WHERE key = ?",
+                                [(when, key) for key, when in self.touched.items()])
+            self.touched.clear()
+        self.db.commit()
+        self.uncommitted = 0
+
+    def flush(self):
+        """Commit index changes still batched in memory"""
+        with self.lock:
+            if self.uncommitted:
+                self._commit()
+
+    def total_bytes(self):
+        with self.lock:
+            return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def evict(self):
+        """Drop least recently used entries until the cache is back under LOW_WATER of max_bytes"""
+        with self.lock:
+            self._commit()
+            # Other processes share the index; start from its real total
+            self.total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if self.total <= self.max_bytes:
+                return
+            target = self.max_bytes * LOW_WATER
+            evicted = []
+            rows = self.db.execute("SELECT key, size FROM entries ORDER BY last_access")
+            for key, size in rows:
+                if self.total <= target:
+                    break
+                evicted.append(key)
+                self.total -= size
+            rows.close()
+            for key in evicted:
+                try:
+                    os.remove(self.body_path(key))
+                except OSError:
+                    pass
+            self.db.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in evicted])
+            self.db.commit()
+            self.stats['evicted'] += len(evicted)
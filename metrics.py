@@ -0,0 +1,191 @@
+import time
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from control import Cancelled
+
+# Latency buckets in seconds for per-request histograms
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.kind}']
+        with self.lock:
+            items = sorted(self.values.items())
+        for key, value in items:
+            lines.append(f'{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}')
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with self.lock:
+            self.values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            counts, total = self.values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self.values[key] = (counts, total + value)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.kind}']
+        with self.lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self.values.items())
+        for key, (counts, total) in items:
+            for bound, count in zip(self.buckets, counts):
+                labels = _format_labels(self.label_names, key, [('le', _format_value(bound))])
+                lines.append(f'{self.name}_bucket{labels} {count}')
+            labels = _format_labels(self.label_names, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {counts[-1]}')
+        return lines
+
+
+class Registry:
+    """Set of metrics rendered together in the Prometheus text format"""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+PAGES_COMPLETED = REGISTRY.register(Counter(
+    'websitepocket_pages_completed_total', 'Pages fully processed'))
+ASSETS_COMPLETED = REGISTRY.register(Counter(
+    'websitepocket_assets_completed_total', 'Assets saved to the project', ['kind']))
+BYTES_DOWNLOADED = REGISTRY.register(Counter(
+    'websitepocket_bytes_downloaded_total', 'Response body bytes received from the network'))
+ERRORS = REGISTRY.register(Counter(
+    'websitepocket_errors_total', 'Failed requests by error type', ['type']))
+IN_FLIGHT = REGISTRY.register(Gauge(
+    'websitepocket_in_flight_requests', 'Requests currently open', ['host']))
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    'websitepocket_queue_depth', 'Assets of the current page waiting or being downloaded'))
+LAST_PROGRESS = REGISTRY.register(Gauge(
+    'websitepocket_last_progress_timestamp_seconds', 'Unix time of the last completed asset or page'))
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    'websitepocket_request_duration_seconds', 'Time to fetch one asset or page', ['kind']))
+
+
+def mark_progress():
+    LAST_PROGRESS.set(time.time())
+
+
+@contextmanager
+def track_request(url, kind):
+    """Count a request as in flight for its host and record its latency and errors"""
+    host = urlparse(url).netloc
+    IN_FLIGHT.inc(host=host)
+    started = time.time()
+    cancelled = False
+    try:
+        yield
+    except Cancelled:
+        # Stopped by the user: neither an error nor a meaningful latency
+        cancelled = True
+        raise
+    except Exception as e:
+        ERRORS.inc(type=type(e).__name__)
+        raise
+    finally:
+        IN_FLIGHT.dec(host=host)
+        if not cancelled:
+            REQUEST_LATENCY.observe(time.time() - started, kind=kind)
+
+
+def start_metrics_server(port, host='127.0.0.1', registry=REGISTRY):
+    """Serve registry at http://host:port/metrics from a daemon thread"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True)
+    thread.start()
+    print(f"Metrics available at http://{host}:{server.server_port}/metrics")
+    return server
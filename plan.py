@@ -0,0 +1,184 @@
+import os
+import json
+import time
+from datetime import datetime
+from urllib.parse import urlparse
+from assets import DONE
+
+# Concurrent HEAD requests while planning
+HEAD_WORKERS = 16
+
+# Used for the time estimate when the project has no earlier downloads to learn from
+DEFAULT_BYTES_PER_SECOND = 1024 * 1024
+DEFAULT_REQUEST_SECONDS = 0.1
+
+# Size assumed for an asset whose size is unknown and has no known sizes of its kind
+DEFAULT_ASSET_BYTES = 50 * 1024
+
+
+def _median(values):
+    values = sorted(values)
+    return values[len(values) // 2] if values else None
+
+
+def observed_bytes_per_second(table, request_seconds):
+    """Transfer rate of assets downloaded earlier, from their recorded sizes and fetch times"""
+    total_bytes = 0
+    total_seconds = 0.0
+    for row in table.rows(DONE):
+        if table.elapsed[row] > 0 and table.size[row] > 0:
+            total_bytes += table.size[row]
+            total_seconds += max(table.elapsed[row] - request_seconds, 0.0)
+    if total_bytes == 0 or total_seconds < 0.01:
+        return None
+    return total_bytes / total_seconds
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+def plan_pages(downloader, urls, workers=HEAD_WORKERS):
+    """Resolve the assets of each page and size them without downloading their bodies.
+
+    Pages and stylesheets are fetched (through the HTTP cache) because the
+    assets are found in them; every other asset is sized from a fresh
+    cache entry or a HEAD request, with up to workers requests at once.
+    Returns the manifest dict (see README).
+    """
+    from bs4 import BeautifulSoup
+    from concurrent.futures import ThreadPoolExecutor
+
+    table = downloader.assets
+    cache = downloader.cache
+    pages = []
+    rows = {}    # asset row -> index in the manifest's asset list
+    sizes = {}   # asset row -> size in bytes, or None if unknown
+
+    for url in urls:
+        try:
+            soup = BeautifulSoup(downloader.fetch_text(url), 'html.parser')
+        except Exception as e:
+            print(f"Error processing {url}: {e}")
+            continue
+        page_rows = []
+        seen = set()
+        queue = downloader.schedule_page_assets(soup, url)
+        while queue:
+            _, task = queue.pop()
+            row = task.asset
+            if row in seen:
+                continue
+            seen.add(row)
+            page_rows.append(row)
+            rows.setdefault(row, len(rows))
+            if table.kind_name(row) != 'css' or row in sizes:
+                continue
+            css_url = table.url(row)
+            try:
+                source = downloader.fetch_text(css_url, kind='css')
+            except Exception as e:
+                print(f"Error downloading {css_url}: {e}")
+                sizes[row] = None
+                continue
+            sizes[row] = len(source.encode('utf-8'))
+            stylesheet = {'source': source, 'replacements': {}, 'dirty': False, 'asset': row}
+            downloader.schedule_css_resources(queue, stylesheet, css_url)
+        pages.append({'url': url, 'path': os.path.relpath(downloader.page_path(url), downloader.base_dir),
+                      'assets': page_rows})
+
+    to_head = []
+    for row in rows:
+        if row in sizes:
+            continue
+        entry = cache.lookup(table.url(row)) if cache else None
+        if entry and (downloader.cache_only or cache.is_fresh(entry)):
+            sizes[row] = entry['size']
+        elif downloader.cache_only:
+            sizes[row] = None
+        else:
+            to_head.append(row)
+
+    latencies = []
+
+    def head(row):
+        started = time.time()
+        size = downloader.remote_size(table.url(row))
+        latencies.append(time.time() - started)
+        return size
+
+    if to_head:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for row, size in zip(to_head, pool.map(head, to_head)):
+                sizes[row] = size
+
+    # Unknown sizes are estimated from the known sizes of the same kind
+    known = {}
+    for row, size in sizes.items():
+        if size is not None:
+            known.setdefault(table.kind_name(row), []).append(size)
+    averages = {kind: sum(values) // len(values) for kind, values in known.items()}
+
+    assets = [None] * len(rows)
+    hosts = {}
+    total_bytes = 0
+    unknown = 0
+    for row, index in rows.items():
+        kind = table.kind_name(row)
+        url = table.url(row)
+        size = sizes.get(row)
+        estimate = size if size is not None else averages.get(kind, DEFAULT_ASSET_BYTES)
+        if size is None:
+            unknown += 1
+        host = urlparse(url).netloc
+        assets[index] = {'url': url, 'path': table.relative_path(row), 'kind': kind,
+                         'host': host, 'size': size, 'estimate': estimate}
+        stats = hosts.setdefault(host, {'assets': 0, 'bytes': 0})
+        stats['assets'] += 1
+        stats['bytes'] += estimate
+        total_bytes += estimate
+    for page in pages:
+        page['assets'] = [rows[row] for row in page['assets']]
+
+    request_seconds = _median(latencies) or DEFAULT_REQUEST_SECONDS
+    bytes_per_second = observed_bytes_per_second(table, request_seconds) or DEFAULT_BYTES_PER_SECOND
+    # Up to the transport's concurrency requests wait on their servers at
+    # once; the bytes still share one connection to the network
+    concurrency = downloader.transport.concurrency
+    return {
+        'created': datetime.now().isoformat(),
+        'pages': pages,
+        'assets': assets,
+        'hosts': hosts,
+        'total_bytes': total_bytes,
+        'unknown_sizes': unknown,
+        'request_seconds': request_seconds,
+        'bytes_per_second': bytes_per_second,
+        'concurrency': concurrency,
+        'estimated_seconds': len(assets) * request_seconds / concurrency + total_bytes / bytes_per_second,
+    }
+
+
+def save_manifest(manifest, path):
+    with open(path + '.part', 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(path + '.part', path)
+
+
+def load_manifest(path):
+    """Manifest saved at path, or None"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def page_estimates(manifest):
+    """{page url: {asset url: estimated bytes}} for driving progress from a manifest"""
+    assets = manifest['assets']
+    return {page['url']: {assets[i]['url']: assets[i]['estimate'] for i in page['assets']}
+            for page in manifest['pages']}
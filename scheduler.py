@@ -0,0 +1,68 @@
+import heapq
+import itertools
+from collections import namedtuple
+
+# Fetch order for page assets, lowest first. Stylesheets and the fonts they
+# reference make a partial mirror readable, so they go before anything else.
+PRIORITY_STYLESHEET = 0
+PRIORITY_FONT = 1
+PRIORITY_BLOCKING_SCRIPT = 2
+PRIORITY_ABOVE_FOLD_IMAGE = 3
+PRIORITY_DEFERRED = 4
+
+# Number of eagerly loaded <img> tags, in document order, treated as above the fold
+ABOVE_FOLD_IMAGES = 6
+
+# asset is the task's row in the run's AssetTable (see assets.py), which
+# holds its URL, kind and local path. apply() runs after a successful fetch
+# and points the referencing HTML or CSS at the local copy;
+# skip(placeholder) runs when budget mode leaves the asset out.
+AssetTask = namedtuple('AssetTask', ['asset', 'apply', 'skip'])
+
+
+class AssetQueue:
+    """Priority queue of asset fetches, first-in first-out within a priority"""
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+
+    def push(self, priority, task):
+        heapq.heappush(self._heap, (priority, next(self._counter), task))
+
+    def pop(self):
+        """Return (priority, task) for the most urgent task"""
+        priority, _, task = heapq.heappop(self._heap)
+        return priority, task
+
+    def pop_level(self):
+        """Return (priority, tasks) for all tasks at the most urgent priority"""
+        priority, task = self.pop()
+        tasks = [task]
+        while self._heap and self._heap[0][0] == priority:
+            tasks.append(heapq.heappop(self._heap)[2])
+        return priority, tasks
+
+    def peek_priority(self):
+        return self._heap[0][0] if self._heap else None
+
+    def __len__(self):
+        return len(self._heap)
+
+
+def script_priority(script):
+    """Scripts without async/defer (or module type) block rendering"""
+    if script.has_attr('async') or script.has_attr('defer') or script.get('type') == 'module':
+        return PRIORITY_DEFERRED
+    return PRIORITY_BLOCKING_SCRIPT
+
+
+def image_priorities(images):
+    """Yield (img, priority) with the first eager images marked above the fold"""
+    eager = 0
+    for img in images:
+        if img.get('loading', '').lower() != 'lazy' and eager < ABOVE_FOLD_IMAGES:
+            eager += 1
+            yield img, PRIORITY_ABOVE_FOLD_IMAGE
+        else:
+            yield img, PRIORITY_DEFERRED
@@ -0,0 +1,159 @@
+import re
+from collections import deque
+from datetime import datetime, timezone
+from urllib.parse import urljoin
+
+
+def parse_lastmod(value):
+    """Parse a W3C datetime (date or full timestamp) as an aware UTC datetime"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def robots_sitemaps(robots_text):
+    """Sitemap URLs listed in a robots.txt body"""
+    sitemaps = []
+    for line in robots_text.splitlines():
+        name, _, value = line.partition(':')
+        if name.strip().lower() == 'sitemap' and value.strip():
+            sitemaps.append(value.strip())
+    return sitemaps
+
+
+def iter_sitemap_entries(stream):
+    """Yield (kind, loc, lastmod) from a sitemap or sitemap index.
+
+    kind is 'url' for page entries and 'sitemap' for index entries. The
+    document is parsed incrementally and each entry is discarded once
+    yielded, so memory use does not grow with the file.
+    """
+    import xml.etree.ElementTree as ET
+    depth = 0
+    loc = lastmod = None
+    root = None
+    for event, elem in ET.iterparse(stream, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            depth += 1
+            continue
+
+        depth -= 1
+        tag = elem.tag.rsplit('}', 1)[-1]
+        if depth == 2 and tag == 'loc':
+            loc = (elem.text or '').strip()
+        elif depth == 2 and tag == 'lastmod':
+            lastmod = parse_lastmod(elem.text)
+        elif depth == 1:
+            if loc and tag in ('url', 'sitemap'):
+                yield tag, loc, lastmod
+            loc = lastmod = None
+            root.clear()
+
+
+class _PrefixedStream:
+    """Read-only stream that replays bytes already read from raw"""
+
+    def __init__(self, prefix, raw):
+        self.prefix = prefix
+        self.raw = raw
+
+    def read(self, size=-1):
+        prefix, self.prefix = self.prefix, b''
+        if size is None or size < 0:
+            return prefix + self.raw.read()
+        if len(prefix) >= size:
+            self.prefix = prefix[size:]
+            return prefix[:size]
+        return prefix + self.raw.read(size - len(prefix))
+
+
+def open_stream(response):
+    """File-like body of a streamed requests response, gunzipping .xml.gz files"""
+    import gzip
+    response.raw.decode_content = True
+    magic = response.raw.read(2)
+    stream = _PrefixedStream(magic, response.raw)
+    if magic == b'\x1f\x8b':
+        return gzip.GzipFile(fileobj=stream)
+    return stream
+
+
+class SitemapSeeder:
+    """Collects page URLs from robots.txt and (nested, possibly gzipped) sitemaps.
+
+    include/exclude are lists of regular expressions matched against each
+    URL. With since set, only URLs whose lastmod is newer are yielded, and
+    child sitemaps whose own lastmod is older are not fetched at all.
+    """
+
+    def __init__(self, include=None, exclude=None, since=None, timeout=30):
+        self.include = [re.compile(p) for p in include or []]
+        self.exclude = [re.compile(p) for p in exclude or []]
+        self.since = since
+        self.timeout = timeout
+        self.newest_lastmod = since
+        self.sitemaps_read = 0
+        self.sitemaps_failed = 0  # while non-zero, newest_lastmod can't be trusted as a watermark
+
+    def discover(self, url):
+        """Sitemaps for url: itself if it looks like one, else robots.txt entries or /sitemap.xml"""
+        import requests
+        if re.search(r'\.xml(\.gz)?$', url.split('?', 1)[0]):
+            return [url]
+        robots_url = urljoin(url, '/robots.txt')
+        try:
+            response = requests.get(robots_url, timeout=self.timeout)
+            sitemaps = robots_sitemaps(response.text) if response.ok else []
+        except requests.RequestException:
+            sitemaps = []
+        return sitemaps or [urljoin(url, '/sitemap.xml')]
+
+    def wanted(self, url):
+        if self.include and not any(p.search(url) for p in self.include):
+            return False
+        return not any(p.search(url) for p in self.exclude)
+
+    def is_new(self, lastmod):
+        return self.since is None or lastmod is None or lastmod > self.since
+
+    def iter_urls(self, sitemap_urls):
+        """Yield page URLs from the given sitemaps, following sitemap indexes"""
+        import requests
+        import xml.etree.ElementTree as ET
+        pending = deque(sitemap_urls)
+        seen = set()
+        while pending:
+            sitemap_url = pending.popleft()
+            if sitemap_url in seen:
+                continue
+            seen.add(sitemap_url)
+
+            try:
+                with requests.get(sitemap_url, stream=True, timeout=self.timeout) as response:
+                    response.raise_for_status()
+                    self.sitemaps_read += 1
+                    for kind, loc, lastmod in iter_sitemap_entries(open_stream(response)):
+                        if not self.is_new(lastmod):
+                            continue
+                        if kind == 'sitemap':
+                            pending.append(loc)
+                            continue
+                        if not self.wanted(loc):
+                            continue
+                        if lastmod and (self.newest_lastmod is None or lastmod > self.newest_lastmod):
+                            self.newest_lastmod = lastmod
+                        yield loc
+            except (requests.RequestException, ET.ParseError, OSError) as e:
+                self.sitemaps_failed += 1
+                print(f"Error reading sitemap {sitemap_url}: {e}")
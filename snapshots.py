@@ -0,0 +1,251 @@
+import os
+import json
+import zlib
+import hashlib
+from datetime import datetime
+
+# Files diffed line by line against their previous version
+TEXT_EXTENSIONS = {'.html', '.htm', '.css', '.js', '.json', '.xml', '.svg', '.txt'}
+
+# Derived or temporary files that are never captured
+SKIP_SUFFIXES = ('.part', '.gz', '.br')
+
+# A delta is stored against an object that may itself be a delta; past
+# this many hops the full content is stored to keep restores fast
+MAX_DELTA_CHAIN = 10
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _is_text(path):
+    return os.path.splitext(path)[1].lower() in TEXT_EXTENSIONS
+
+
+def _make_delta(base, data):
+    """Line-based delta turning base into data: [[start, end] to copy base lines, or "text" to insert]"""
+    import difflib
+    base_lines = base.decode('utf-8', 'surrogateescape').splitlines(keepends=True)
+    new_lines = data.decode('utf-8', 'surrogateescape').splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, base_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j1 < j2:
+            ops.append(''.join(new_lines[j1:j2]))
+    return ops
+
+
+def _apply_delta(base, ops):
+    base_lines = base.decode('utf-8', 'surrogateescape').splitlines(keepends=True)
+    parts = []
+    for op in ops:
+        if isinstance(op, list):
+            parts.extend(base_lines[op[0]:op[1]])
+        else:
+            parts.append(op)
+    return ''.join(parts).encode('utf-8', 'surrogateescape')
+
+
+class SnapshotStore:
+    """Timestamped snapshots of a project folder.
+
+    Objects are addressed by the SHA-256 of their content, so a file that
+    did not change between snapshots is stored once. A changed text file
+    is stored as a line delta against its version in the previous snapshot
+    when that is smaller than compressing it whole. Files whose size and
+    mtime match the previous snapshot are not even read again.
+    """
+
+    def __init__(self, project_dir, store_dir=None):
+        self.project_dir = project_dir
+        if store_dir is None:
+            name = os.path.basename(os.path.normpath(project_dir))
+            store_dir = os.path.join(os.path.dirname(os.path.normpath(project_dir)), '.snapshots', name)
+        self.store_dir = store_dir
+        self.objects_dir = os.path.join(store_dir, 'objects')
+        self.manifests_dir = os.path.join(store_dir, 'snapshots')
+
+    # Objects
+
+    def _object_path(self, sha):
+        return os.path.join(self.objects_dir, sha[:2], sha)
+
+    def has_object(self, sha):
+        return os.path.exists(self._object_path(sha))
+
+    def _write_object(self, sha, header, payload):
+        path = self._object_path(sha)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        blob = zlib.compress(header + b'\n' + payload, 6)
+        with open(path + '.part', 'wb') as f:
+            f.write(blob)
+        os.replace(path + '.part', path)
+        return len(blob)
+
+    def _read_header(self, sha):
+        with open(self._object_path(sha), 'rb') as f:
+            raw = zlib.decompress(f.read())
+        header, _, payload = raw.partition(b'\n')
+        return header.decode('ascii').split(), payload
+
+    def delta_depth(self, sha):
+        header, _ = self._read_header(sha)
+        return int(header[2]) if header[0] == 'delta' else 0
+
+    def read_object(self, sha):
+        """Full content of an object, resolving delta chains"""
+        header, payload = self._read_header(sha)
+        if header[0] == 'full':
+            return payload
+        return _apply_delta(self.read_object(header[1]), json.loads(payload))
+
+    def store_object(self, data, base_sha=None):
+        """Store data unless present; returns (sha, bytes written)"""
+        sha = _sha256(data)
+        if self.has_object(sha):
+            return sha, 0
+
+        full = zlib.compress(data, 6)
+        if base_sha and self.has_object(base_sha):
+            depth = self.delta_depth(base_sha) + 1
+            if depth <= MAX_DELTA_CHAIN:
+                ops = json.dumps(_make_delta(self.read_object(base_sha), data)).encode('utf-8')
+                if len(zlib.compress(ops, 6)) < len(full):
+                    return sha, self._write_object(sha, f'delta {base_sha} {depth}'.encode('ascii'), ops)
+        return sha, self._write_object(sha, b'full', data)
+
+    # Snapshots
+
+    def snapshot_ids(self):
+        """Ids of the saved snapshots, oldest first (ids are timestamps)"""
+        if not os.path.isdir(self.manifests_dir):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.manifests_dir) if name.endswith('.json'))
+
+    def list_snapshots(self):
+        """Snapshot manifests (without the file lists), oldest first"""
+        snapshots = []
+        for snapshot_id in self.snapshot_ids():
+            manifest = self.load(snapshot_id)
+            manifest.pop('files')
+            snapshots.append(manifest)
+        return snapshots
+
+    def load(self, snapshot_id):
+        with open(os.path.join(self.manifests_dir, f'{snapshot_id}.json'), 'r') as f:
+            return json.load(f)
+
+    def latest(self):
+        """Newest snapshot manifest, or None; only its manifest is read"""
+        ids = self.snapshot_ids()
+        return self.load(ids[-1]) if ids else None
+
+    def _project_files(self):
+        for dirpath, _, filenames in os.walk(self.project_dir):
+            for name in filenames:
+                if name.endswith(SKIP_SUFFIXES):
+                    continue
+                path = os.path.join(dirpath, name)
+                yield os.path.relpath(path, self.project_dir).replace(os.sep, '/'), path
+
+    def create(self, label=None):
+        """Capture the project folder; returns the new snapshot manifest"""
+        previous = self.latest()
+        previous_files = previous['files'] if previous else {}
+        files = {}
+        stored_bytes = 0
+        changed = 0
+
+        for rel_path, path in self._project_files():
+            stat = os.stat(path)
+            old = previous_files.get(rel_path)
+            if old and old['size'] == stat.st_size and old['mtime_ns'] == stat.st_mtime_ns:
+                files[rel_path] = old
+                continue
+
+            with open(path, 'rb') as f:
+                data = f.read()
+            base_sha = old['sha'] if old and _is_text(rel_path) else None
+            sha, written = self.store_object(data, base_sha)
+            stored_bytes += written
+            if not old or old['sha'] != sha:
+                changed += 1
+            files[rel_path] = {'sha': sha, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+        now = datetime.now()
+        snapshot_id = now.strftime('%Y%m%dT%H%M%S%f')
+        manifest = {
+            'id': snapshot_id,
+            'created': now.isoformat(),
+            'label': label,
+            'file_count': len(files),
+            'total_bytes': sum(entry['size'] for entry in files.values()),
+            'changed_files': changed,
+            'stored_bytes': stored_bytes,
+            'files': files,
+        }
+        os.makedirs(self.manifests_dir, exist_ok=True)
+        path = os.path.join(self.manifests_dir, f'{snapshot_id}.json')
+        with open(path + '.part', 'w') as f:
+            json.dump(manifest, f)
+        os.replace(path + '.part', path)
+        return manifest
+
+    def restore(self, snapshot_id, target_dir=None, clean=False):
+        """Write a snapshot's files into target_dir (the project folder by default).
+
+        With clean, files in target_dir that are not part of the snapshot
+        are removed, except the .part/.gz/.br files snapshots never hold.
+        Returns the number of files written.
+        """
+        target_dir = target_dir or self.project_dir
+        files = self.load(snapshot_id)['files']
+        written = 0
+        for rel_path, entry in files.items():
+            path = os.path.join(target_dir, *rel_path.split('/'))
+            try:
+                with open(path, 'rb') as f:
+                    if _sha256(f.read()) == entry['sha']:
+                        continue
+            except OSError:
+                pass
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + '.part', 'wb') as f:
+                f.write(self.read_object(entry['sha']))
+            os.replace(path + '.part', path)
+            written += 1
+
+        if clean and os.path.isdir(target_dir):
+            for dirpath, _, filenames in os.walk(target_dir):
+                for name in filenames:
+                    if name.endswith(SKIP_SUFFIXES):
+                        continue
+                    path = os.path.join(dirpath, name)
+                    if os.path.relpath(path, target_dir).replace(os.sep, '/') not in files:
+                        os.remove(path)
+        return written
+
+    def diff(self, old_id, new_id):
+        """Paths added, removed and changed between two snapshots"""
+        old_files = self.load(old_id)['files']
+        new_files = self.load(new_id)['files']
+        return {
+            'added': sorted(set(new_files) - set(old_files)),
+            'removed': sorted(set(old_files) - set(new_files)),
+            'changed': sorted(path for path in set(old_files) & set(new_files)
+                              if old_files[path]['sha'] != new_files[path]['sha']),
+        }
+
+    def diff_file(self, old_id, new_id, rel_path):
+        """Unified diff of one text file between two snapshots"""
+        import difflib
+        old_entry = self.load(old_id)['files'].get(rel_path)
+        new_entry = self.load(new_id)['files'].get(rel_path)
+        old_text = self.read_object(old_entry['sha']).decode('utf-8', 'replace') if old_entry else ''
+        new_text = self.read_object(new_entry['sha']).decode('utf-8', 'replace') if new_entry else ''
+        return ''.join(difflib.unified_diff(
+            old_text.splitlines(keepends=True), new_text.splitlines(keepends=True),
+            fromfile=f'{old_id}/{rel_path}', tofile=f'{new_id}/{rel_path}'))
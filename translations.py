@@ -5,9 +5,19 @@ TRANSLATIONS = {
         'new_project': 'New Project',
         'create_new': 'Create New Project',
         'enter_url': 'Enter URL',
+        'filter_urls': 'Filter URLs',
         'add_url': 'Add URL',
+        'import_sitemap': 'Import Sitemap',
+        'enter_sitemap_url': 'Site, robots.txt or sitemap URL:',
+        'importing_sitemap': 'Reading sitemaps...',
+        'sitemap_imported': '{} URLs added from sitemaps',
+        'estimate': 'Estimate Size',
+        'planning': 'Sizing assets...',
+        'plan_summary': '{pages} pages, {assets} assets on {hosts} hosts\nDownload size: {size} ({unknown} sizes estimated)\nEstimated time: {time}',
         'replace_links': 'Replace links with #',
         'replace_forms': 'Replace form actions with #',
+        'budget_mode': 'Bandwidth budget (skip large assets)',
+        'use_http2': 'Use HTTP/2',
         'start_download': 'Start Download',
         'abort': 'Abort',
         'ready': 'Ready',
@@ -16,6 +26,10 @@ TRANSLATIONS = {
         'current_file': 'Current file: ',
         'none': 'None',
         'aborting': 'Aborting...',
+        'download_aborted': 'Download aborted',
+        'pause': 'Pause',
+        'resume': 'Resume',
+        'paused': 'Paused',
         'completed': 'Download completed!',
         'success': 'Success',
         'error': 'Error',
@@ -27,6 +41,7 @@ TRANSLATIONS = {
         'want_redownload': 'Do you want to redownload all files?',
         'download_success': 'Download completed successfully!',
         'download_completed': 'Download completed successfully!',
+        'download_incomplete': '{} URLs could not be fully downloaded. Run "python download.py --project {} --repair" to fetch only the missing files.',
         'time_remain': 'Time remaining',
         'create_new_project': 'Create New Project',
         'url': 'URL',
@@ -47,9 +62,19 @@ TRANSLATIONS = {
         'new_project': 'مشروع جديد',
         'create_new': 'إنشاء مشروع جديد',
         'enter_url': 'أدخل الرابط',
+        'filter_urls': 'تصفية الروابط',
         'add_url': 'إضافة رابط',
+        'import_sitemap': 'استيراد خريطة الموقع',
+        'enter_sitemap_url': 'رابط الموقع أو robots.txt أو خريطة الموقع:',
+        'importing_sitemap': 'جاري قراءة خرائط الموقع...',
+        'sitemap_imported': 'تمت إضافة {} رابط من خرائط الموقع',
+        'estimate': 'تقدير الحجم',
+        'planning': 'جاري حساب أحجام الملفات...',
+        'plan_summary': '{pages} صفحات، {assets} ملفات على {hosts} خوادم\nحجم التحميل: {size} ({unknown} أحجام تقديرية)\nالوقت المتوقع: {time}',
         'replace_links': '# استبدال الروابط بـ',
         'replace_forms': '# استبدال نماذج الإرسال بـ ',
+        'budget_mode': 'توفير البيانات (تخطي الملفات الكبيرة)',
+        'use_http2': 'استخدام HTTP/2',
         'start_download': 'بدء التحميل',
         'abort': 'إلغاء',
         'ready': 'جاهز',
@@ -58,6 +83,10 @@ TRANSLATIONS = {
         'current_file': 'الملف الحالي: ',
         'none': 'لا شيء',
         'aborting': 'جاري الإلغاء...',
+        'download_aborted': 'تم إلغاء التحميل',
+        'pause': 'إيقاف مؤقت',
+        'resume': 'استئناف',
+        'paused': 'متوقف مؤقتاً',
         'completed': 'اكتمل التحميل!',
         'success': 'نجاح',
         'error': 'خطأ',
@@ -69,6 +98,7 @@ TRANSLATIONS = {
         'want_redownload': 'هل تريد إعادة تحميل جميع الملفات؟',
         'download_success': 'تم التحميل بنجاح!',
         'download_completed': '!تم التنزيل بنجاح',
+        'download_incomplete': 'تعذر تحميل {} روابط بالكامل. شغّل "python download.py --project {} --repair" لتحميل الملفات الناقصة فقط.',
         'time_remain': 'الوقت المتبقي',
         'create_new_project': 'إنشاء مشروع جديد',
         'url': 'الرابط',
@@ -0,0 +1,248 @@
+import time
+import socket
+import threading
+
+# Transports a project can use; 'http2' needs the optional httpx[http2] package
+TRANSPORTS = ('http1', 'http2')
+
+# Assets fetched at once within a priority level. HTTP/1.1 needs a
+# connection per request, so stay near a browser's per-host limit; HTTP/2
+# multiplexes them as streams on one connection per host.
+DEFAULT_CONCURRENCY = {'http1': 6, 'http2': 16}
+
+# Seconds to wait for a server before giving up on a request
+REQUEST_TIMEOUT = 60
+
+# Lifetime of a DNS answer when its TTL can't be read (no dnspython), and
+# the bounds applied to TTLs that can
+DEFAULT_DNS_TTL = 60
+MIN_DNS_TTL = 5
+MAX_DNS_TTL = 3600
+
+
+_resolver = None  # dns.resolver once imported, False if dnspython is missing
+
+
+def _shutdown(sock):
+    """Shut a socket down so that reads blocked on it in other threads return"""
+    if sock is None:
+        return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+def _is_literal(host):
+    """True for IP addresses and localhost, which need no DNS query"""
+    if host == 'localhost' or host.endswith('.localhost'):
+        return True
+    import ipaddress
+    try:
+        ipaddress.ip_address(host.split('%', 1)[0])
+        return True
+    except ValueError:
+        return False
+
+
+def _record_ttl(host, record_type):
+    """TTL of host's A or AAAA record via dnspython, or None if that is not available"""
+    global _resolver
+    if _resolver is None:
+        try:
+            import dns.resolver
+            _resolver = dns.resolver
+        except ImportError:
+            _resolver = False
+    if not _resolver:
+        return None
+    try:
+        return _resolver.resolve(host, record_type, lifetime=2).rrset.ttl
+    except Exception:
+        return None
+
+
+class DNSCache:
+    """In-process cache in front of socket.getaddrinfo.
+
+    Once installed, every connection the process opens (requests/urllib3
+    and httpx alike) resolves through it, so a page's many assets from one
+    CDN host cost a single lookup. Answers expire after their record's TTL
+    when dnspython is installed to read it, and after DEFAULT_DNS_TTL
+    otherwise.
+    """
+
+    _default = None
+
+    def __init__(self, default_ttl=DEFAULT_DNS_TTL):
+        self.default_ttl = default_ttl
+        self.entries = {}  # getaddrinfo arguments -> (expires, result)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._getaddrinfo = None
+
+    @classmethod
+    def default(cls):
+        if cls._default is None:
+            cls._default = cls()
+        return cls._default
+
+    def install(self):
+        """Route socket.getaddrinfo through this cache (idempotent)"""
+        if self._getaddrinfo is None:
+            self._getaddrinfo = socket.getaddrinfo
+            socket.getaddrinfo = self.getaddrinfo
+
+    def uninstall(self):
+        if self._getaddrinfo is not None:
+            socket.getaddrinfo = self._getaddrinfo
+            self._getaddrinfo = None
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        resolve = self._getaddrinfo or socket.getaddrinfo
+        key = (host, port, family, type, proto, flags)
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return list(entry[1])
+
+        result = resolve(host, port, family, type, proto, flags)
+        ttl = None
+        # The TTL lookup is a second query: only for names that went to DNS,
+        # and only for the record type that answered
+        if result and isinstance(host, str) and not _is_literal(host):
+            ttl = _record_ttl(host, 'AAAA' if result[0][0] == socket.AF_INET6 else 'A')
+        ttl = self.default_ttl if ttl is None else min(max(ttl, MIN_DNS_TTL), MAX_DNS_TTL)
+        with self.lock:
+            self.entries[key] = (now + ttl, result)
+            self.misses += 1
+        return list(result)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class Http1Transport:
+    """HTTP/1.1 through one pooled requests.Session, so connections are kept alive"""
+
+    name = 'http1'
+
+    def __init__(self, concurrency=None):
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.concurrency = concurrency or DEFAULT_CONCURRENCY[self.name]
+        self.session = requests.Session()
+        # Planning sends many HEAD requests at once; keep a connection for each
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=max(self.concurrency, 32))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get(self, url, headers=None, stream=False, timeout=REQUEST_TIMEOUT):
+        return self.session.get(url, headers=headers, stream=stream, timeout=timeout)
+
+    def head(self, url, timeout=10):
+        return self.session.head(url, allow_redirects=True, timeout=timeout)
+
+    def abort(self, response):
+        """Wake any thread reading response; it closes the response itself"""
+        try:
+            sock = response.raw._fp.fp.raw._sock
+        except AttributeError:
+            sock = None  # body already read, or not a plain socket
+        _shutdown(sock)
+
+    def close(self):
+        self.session.close()
+
+
+class _HttpxResponse:
+    """The part of the requests.Response interface the downloader uses, over an httpx response"""
+
+    def __init__(self, response):
+        self.response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = str(response.url)
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def content(self):
+        return self.response.read()
+
+    @property
+    def text(self):
+        self.response.read()
+        return self.response.text
+
+    def iter_content(self, chunk_size=None):
+        return self.response.iter_bytes(chunk_size)
+
+    def close(self):
+        self.response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Http2Transport:
+    """HTTP/2 through one httpx client: concurrent requests to a host share one
+    connection as multiplexed streams. Servers without HTTP/2 are spoken to
+    in HTTP/1.1 by the same client."""
+
+    name = 'http2'
+
+    def __init__(self, concurrency=None, http1=True):
+        """With http1=False, HTTP/2 is spoken with prior knowledge, plain http:// included"""
+        import httpx
+        self.concurrency = concurrency or DEFAULT_CONCURRENCY[self.name]
+        self.client = httpx.Client(
+            http1=http1, http2=True, follow_redirects=True, timeout=REQUEST_TIMEOUT,
+            limits=httpx.Limits(max_connections=max(self.concurrency, 32),
+                                max_keepalive_connections=32))
+
+    def get(self, url, headers=None, stream=False, timeout=REQUEST_TIMEOUT):
+        request = self.client.build_request('GET', url, headers=headers, timeout=timeout)
+        response = self.client.send(request, stream=stream)
+        return _HttpxResponse(response)
+
+    def head(self, url, timeout=10):
+        return _HttpxResponse(self.client.head(url, timeout=timeout))
+
+    def abort(self, response):
+        """Wake any thread reading response. On HTTP/2 this ends every stream
+        sharing its connection, which is what cancelling the run wants."""
+        stream = response.response.extensions.get('network_stream')
+        _shutdown(stream.get_extra_info('socket') if stream is not None else None)
+
+    def close(self):
+        self.client.close()
+
+
+def http2_available():
+    try:
+        import httpx  # noqa: F401
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def make_transport(name='http1', concurrency=None, dns_cache=True):
+    """Transport called name, falling back to HTTP/1.1 when HTTP/2 support is not installed"""
+    if dns_cache:
+        DNSCache.default().install()
+    if name == 'http2':
+        if http2_available():
+            return Http2Transport(concurrency)
+        print("HTTP/2 needs 'pip install httpx[http2]'; using HTTP/1.1")
+    return Http1Transport(concurrency)
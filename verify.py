@@ -0,0 +1,76 @@
+import os
+import mmap
+import hashlib
+from assets import DONE, SKIPPED
+
+# Below this many bytes to hash, starting worker processes costs more than it saves
+MIN_POOL_BYTES = 32 * 1024 * 1024
+
+# Problems reported for an asset
+MISSING = 'missing'          # recorded as saved, but the file is gone
+INCOMPLETE = 'incomplete'    # never finished: failed, or interrupted mid-run
+SIZE_MISMATCH = 'size'
+HASH_MISMATCH = 'hash'
+
+
+def hash_file(path):
+    """SHA-256 digest of a file, hashed straight from an mmap (None if unreadable)"""
+    try:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return hashlib.sha256().digest()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return hashlib.sha256(mapped).digest()
+    except (OSError, ValueError):
+        return None
+
+
+def verify_assets(table, base_dir, workers=None):
+    """Check every asset in an AssetTable against the files under base_dir.
+
+    Sizes are compared first from a stat of each file; only files of the
+    right size are hashed, on a process pool when there is enough data to
+    make that worthwhile. Returns a sorted list of (row, problem).
+    """
+    problems = []
+    to_hash = []
+    hash_bytes = 0
+    for row in table.rows():
+        status = table.status[row]
+        if status == SKIPPED:
+            continue
+        if status != DONE:
+            problems.append((row, INCOMPLETE))
+            continue
+        path = os.path.join(base_dir, *table.relative_path(row).split('/'))
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            problems.append((row, MISSING))
+            continue
+        if table.size[row] >= 0 and size != table.size[row]:
+            problems.append((row, SIZE_MISMATCH))
+        elif table.digest(row) is not None:
+            to_hash.append((row, path))
+            hash_bytes += size
+
+    if to_hash:
+        paths = [path for _, path in to_hash]
+        pool = None
+        if hash_bytes >= MIN_POOL_BYTES and workers != 1:
+            from concurrent.futures import ProcessPoolExecutor
+            pool = ProcessPoolExecutor(max_workers=workers)
+            chunksize = max(1, len(paths) // ((workers or os.cpu_count() or 1) * 8))
+            digests = pool.map(hash_file, paths, chunksize=chunksize)
+        else:
+            digests = map(hash_file, paths)
+        try:
+            for (row, _), digest in zip(to_hash, digests):
+                if digest != table.digest(row):
+                    problems.append((row, HASH_MISMATCH))
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+    problems.sort()
+    return problems
@@ -0,0 +1,235 @@
+import os
+import queue
+import shutil
+import threading
+
+# Bytes buffered per open file before the writer thread hits the disk
+BUFFER_SIZE = 1024 * 1024
+
+# Operations waiting for the writer thread; the fetching side blocks when
+# it is full, which bounds memory to roughly MAX_PENDING network chunks
+MAX_PENDING = 64
+
+# Files fsynced and renamed together when fsync is on
+FSYNC_BATCH = 32
+
+# Read once at import: os.umask can only be queried by setting it
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+class WriteHandle:
+    """A file being written by DiskWriter; it only appears at path once committed"""
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = None
+        self.file = None
+        self.failed = False
+        self.on_error = None  # set by the writer thread once the file is committed
+
+
+class DiskWriter:
+    """Background stage that performs all file writes for a downloader.
+
+    Callers enqueue chunks and commits and carry on fetching. Each file is
+    written to a temporary "<name>.<random>.part" next to path through a
+    large buffer and renamed over path on commit, so an interrupted run
+    never leaves a truncated file at its final path. A file that hits an
+    error at any stage is discarded instead of committed, its on_error
+    callback runs, and the error is returned by the next flush(). With
+    fsync on, committed files are fsynced and renamed in batches (and
+    their directories fsynced once per batch) when a batch is full or on
+    flush(), instead of one at a time.
+    """
+
+    def __init__(self, fsync=False, fsync_batch=FSYNC_BATCH, max_pending=MAX_PENDING,
+                 buffer_size=BUFFER_SIZE):
+        self.fsync = fsync
+        self.fsync_batch = fsync_batch
+        self.buffer_size = buffer_size
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.pending = []  # (handle, on_commit) waiting for a batch fsync
+        self.errors = []
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def _ensure_thread(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='disk-writer', daemon=True)
+                self.thread.start()
+
+    def _put(self, op):
+        self._ensure_thread()
+        self.queue.put(op)
+
+    # Producer side
+
+    def open(self, path):
+        handle = WriteHandle(path)
+        self._put(('open', handle))
+        return handle
+
+    def write(self, handle, data):
+        self._put(('write', handle, data))
+
+    def commit(self, handle, on_commit=None, on_error=None):
+        """Close handle and move it to its final path.
+
+        on_commit runs in the writer thread once the file is in place, or
+        on_error if it could not be saved.
+        """
+        self._put(('commit', handle, on_commit, on_error))
+
+    def discard(self, handle):
+        self._put(('discard', handle))
+
+    def write_text(self, path, content):
+        self._put(('text', WriteHandle(path), content))
+
+    def copy(self, src, path, on_commit=None, on_error=None):
+        self._put(('copy', WriteHandle(path), src, on_commit, on_error))
+
+    def flush(self):
+        """Block until everything queued so far is committed; return and clear the errors
+        of the files that could not be saved"""
+        done = threading.Event()
+        self._put(('flush', done))
+        done.wait()
+        errors, self.errors = self.errors, []
+        return errors
+
+    # Writer thread
+
+    def _run(self):
+        while True:
+            op = self.queue.get()
+            try:
+                getattr(self, '_do_' + op[0])(*op[1:])
+            except Exception as e:
+                self._error(e)
+                if isinstance(op[1], WriteHandle):
+                    self._fail(op[1])
+
+    def _error(self, error):
+        self.errors.append(error)
+        print(f"Error writing file: {error}")
+
+    def _fail(self, handle):
+        """Give up on handle: drop its temporary file and report it if it was committed"""
+        handle.failed = True
+        if handle.file is not None:
+            try:
+                handle.file.close()
+            except OSError:
+                pass
+            handle.file = None
+        if handle.tmp_path is not None:
+            try:
+                os.remove(handle.tmp_path)
+            except OSError:
+                pass
+        self._report_failure(handle)
+
+    def _report_failure(self, handle):
+        on_error, handle.on_error = handle.on_error, None
+        if on_error:
+            try:
+                on_error()
+            except Exception as e:
+                self._error(e)
+
+    def _mkstemp(self, handle, mode, **kwargs):
+        """Open a uniquely named temporary file in handle.path's directory"""
+        import tempfile  # ~9 ms, only needed once a file is written
+        directory, name = os.path.split(handle.path)
+        fd, handle.tmp_path = tempfile.mkstemp(prefix=name + '.', suffix='.part', dir=directory or '.')
+        if hasattr(os, 'fchmod'):
+            os.fchmod(fd, 0o666 & ~UMASK)  # mkstemp makes it private; saved pages should not be
+        return os.fdopen(fd, mode, **kwargs)
+
+    def _do_open(self, handle):
+        handle.file = self._mkstemp(handle, 'wb', buffering=self.buffer_size)
+
+    def _do_write(self, handle, data):
+        if not handle.failed:
+            handle.file.write(data)
+
+    def _do_commit(self, handle, on_commit, on_error):
+        handle.on_error = on_error
+        if handle.failed:
+            # Failed while being written; the error is already recorded
+            self._report_failure(handle)
+            return
+        handle.file.close()
+        handle.file = None
+        self._finish(handle, on_commit)
+
+    def _do_discard(self, handle):
+        self._fail(handle)
+
+    def _do_text(self, handle, content):
+        # No newline translation: the size recorded for a stylesheet is that of its UTF-8 text
+        with self._mkstemp(handle, 'w', encoding='utf-8', newline='') as f:
+            f.write(content)
+        self._finish(handle, None)
+
+    def _do_copy(self, handle, src, on_commit, on_error):
+        handle.on_error = on_error
+        self._mkstemp(handle, 'wb').close()
+        shutil.copyfile(src, handle.tmp_path)
+        self._finish(handle, on_commit)
+
+    def _do_flush(self, done):
+        try:
+            self._commit_pending()
+        finally:
+            done.set()
+
+    def _finish(self, handle, on_commit):
+        if not self.fsync:
+            os.replace(handle.tmp_path, handle.path)
+            self._committed(handle, on_commit)
+            return
+        self.pending.append((handle, on_commit))
+        if len(self.pending) >= self.fsync_batch:
+            self._commit_pending()
+
+    def _committed(self, handle, on_commit):
+        handle.on_error = None
+        try:
+            if on_commit:
+                on_commit()
+        except Exception as e:
+            self._error(e)
+
+    def _commit_pending(self):
+        """fsync a batch of finished files, rename them in order, then fsync their directories"""
+        batch, self.pending = self.pending, []
+        try:
+            for handle, _ in batch:
+                fd = os.open(handle.tmp_path, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            directories = set()
+            for handle, _ in batch:
+                os.replace(handle.tmp_path, handle.path)
+                directories.add(os.path.dirname(handle.path))
+            if hasattr(os, 'O_DIRECTORY'):
+                for directory in directories:
+                    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        os.close(fd)
+        except OSError as e:
+            # Files already renamed are in place, but not known to be durable
+            self._error(e)
+            for handle, _ in batch:
+                self._fail(handle)
+            return
+        for handle, on_commit in batch:
+            self._committed(handle, on_commit)